@@ -0,0 +1,604 @@
+"""
+Benchmarks for the search and move generation code
+
+usage: python benchmark.py search [chess|checkers] [depths...]
+       python benchmark.py movegen [chess|checkers]
+       python benchmark.py moves [chess|checkers]
+       python benchmark.py board [chess|checkers]
+       python benchmark.py history [chess|checkers]
+       python benchmark.py fen [lines]
+       python benchmark.py pgn [games]
+       python benchmark.py archive [chess|checkers] [games]
+       python benchmark.py positions [chess|checkers] [games]
+       python benchmark.py parallel [chess|checkers] [depth]
+       python benchmark.py staged [chess|checkers] [depth]
+       python benchmark.py terminal [chess|checkers]
+"""
+import copy
+import io
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from constants import CHECKERS, CHESS, LOSS, TT_SIZE_MB, WIN
+from board import Board
+from bitboard import BitBoard
+from players import MiniMax, ParallelMiniMax
+from perft import new_game_state
+from move_ordering import MoveOrderer
+from game_history import GameHistory, replay_move
+from chess.fen import START_FEN, from_fen, read_fens, to_fen
+from chess import pgn
+from checkers import pdn
+from game_archive import ArchiveWriter, GameArchive, index_path
+from position_db import PositionDB, build
+
+
+def sample_positions(game, board_class=Board, games=10, plies=60, seed=0, first_ply=0):
+    """Plays seeded random games and returns the move sequence reaching each position visited
+
+    Moves are recorded by their coordinates so lines can be replayed on any board class,
+    whatever order it generates moves in. Positions before first_ply are skipped, which
+    gives middlegame positions when it is past the opening.
+    """
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(games):
+        game_state = new_game_state(game, board_class)
+        line = []
+        for ply in range(plies):
+            options = game_state.all_possible_moves()
+            if len(options) == 0 or game_state.check_loss():
+                break
+            if ply >= first_ply:
+                lines.append(list(line))
+            move = options[rng.randrange(len(options))]
+            move.execute(game_state)
+            line.append(move_coords(move))
+    return lines
+
+
+def move_coords(move):
+    "Coordinates identifying a move independent of the board it was generated on"
+    return str(move._start), str(move._end), tuple(str(cap) for cap in move._captures)
+
+
+def replay(game, line, board_class=Board):
+    "Returns a new game state after playing the given moves (as move_coords) from the starting position"
+    game_state = new_game_state(game, board_class)
+    for coords in line:
+        for move in game_state.all_possible_moves():
+            if move_coords(move) == coords:
+                move.execute(game_state)
+                break
+    return game_state
+
+
+def bench_movegen(game, board_class, lines, repeat=20):
+    """Times all_possible_moves over a set of positions
+
+    Returns:
+        tuple: (move lists generated, moves generated, seconds elapsed)
+    """
+    states = [replay(game, line, board_class) for line in lines]
+    lists = 0
+    moves = 0
+    start = time.perf_counter()
+    for game_state in states:
+        for _ in range(repeat):
+            # forget the cached list so that every call generates the moves again
+            game_state._position_cache.clear()
+            moves += len(game_state.all_possible_moves())
+        lists += repeat
+    return lists, moves, time.perf_counter() - start
+
+
+def bench_move_memory(game, board_class, lines):
+    """Measures the memory held by the move lists of a set of positions, and allocated while executing and undoing them
+
+    Returns:
+        tuple: (moves generated, bytes held by the move lists, bytes allocated by one execute and undo of every move)
+    """
+    states = [replay(game, line, board_class) for line in lines]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    lists = [game_state.all_possible_moves() for game_state in states]
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    for game_state, options in zip(states, lists):
+        for move in options:
+            move.execute(game_state)
+            move.undo(game_state)
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return sum(len(options) for options in lists), held, allocated
+
+
+def bench_board_memory(game, board_class, repeat=200):
+    """Measures the memory taken by a game state in its starting position and how long it takes to copy
+
+    Returns:
+        tuple: (bytes allocated building the game state, bytes of its pickle, seconds per deepcopy)
+    """
+    # the first board of a size also builds the shared move tables, which are not part of its own size
+    new_game_state(game, board_class)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    game_state = new_game_state(game, board_class)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        copy.deepcopy(game_state)
+    return size, len(pickle.dumps(game_state)), (time.perf_counter() - start) / repeat
+
+
+def bench_history(game, plies=1000, keyframe_interval=None, snapshots=False, seed=0):
+    """Plays random moves into a GameHistory and measures the memory it keeps
+
+    Games that end are followed by new ones until the number of plies is reached.
+
+    Args:
+        keyframe_interval (int, optional): passed on to GameHistory. Defaults to None.
+        snapshots (bool, optional): keep a deepcopy of the game state before every move instead,
+            as the game drivers used to. Defaults to False.
+
+    Returns:
+        tuple: (bytes kept for the plies, seconds per state_at call for random plies, or None for snapshots)
+    """
+    rng = random.Random(seed)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    histories = []
+    played = 0
+    while played < plies:
+        game_state = new_game_state(game)
+        history = [] if snapshots else GameHistory(game_state, keyframe_interval)
+        histories.append(history)
+        while played < plies and not game_state.check_loss() and not game_state.check_draw():
+            options = game_state.all_possible_moves()
+            move = options[rng.randrange(len(options))]
+            if snapshots:
+                history.append(copy.deepcopy(game_state))
+            move.execute(game_state)
+            if not snapshots:
+                history.push(move, game_state)
+            played += 1
+        # drop the current game's move list so only the history is measured
+        game_state._position_cache.clear()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    if snapshots:
+        return size, None
+    start = time.perf_counter()
+    lookups = 20
+    for _ in range(lookups):
+        history = histories[rng.randrange(len(histories))]
+        history.state_at(rng.randrange(history.ply + 1))
+    return size, (time.perf_counter() - start) / lookups
+
+
+def bench_fen(lines=100000):
+    """Times FEN export, bulk loading with read_fens and building a new game state per FEN with from_fen
+
+    The FENs are those of sampled random game positions, repeated up to the number of lines.
+
+    Returns:
+        dict: name -> FEN lines handled per second
+    """
+    game_states = [replay(CHESS, line) for line in sample_positions(CHESS, first_ply=10)]
+    start = time.perf_counter()
+    fens = [to_fen(game_state) for game_state in game_states]
+    rates = {"to_fen": len(fens) / (time.perf_counter() - start)}
+    fens = (fens * (lines // len(fens) + 1))[:lines]
+
+    start = time.perf_counter()
+    for _ in read_fens(fens):
+        pass
+    rates["read_fens"] = lines / (time.perf_counter() - start)
+
+    sample = fens[:1000]
+    start = time.perf_counter()
+    for fen in sample:
+        from_fen(fen)
+    rates["from_fen"] = len(sample) / (time.perf_counter() - start)
+    return rates
+
+
+def random_games(game, count, max_plies=200, seed=0):
+    """Plays seeded random games to their end or max_plies
+
+    Returns:
+        list: (game state in the starting position, executed moves) for each game
+    """
+    rng = random.Random(seed)
+    recorded = []
+    for _ in range(count):
+        game_state = new_game_state(game)
+        start_state = copy.deepcopy(game_state)
+        moves = []
+        while len(moves) < max_plies and not game_state.check_loss() and not game_state.check_draw():
+            options = game_state.all_possible_moves()
+            move = options[rng.randrange(len(options))]
+            move.execute(game_state)
+            moves.append(move)
+        recorded.append((start_state, moves))
+    return recorded
+
+
+def bench_archive(game, games=2000, distinct=50, lookups=200, replayed=200, seed=0):
+    """Compares the size of games in an archive with PGN or PDN text and pickled game states, and times
+    writing, random access and replaying
+
+    The distinct games are seeded random games, repeated up to the number of games in a temporary archive.
+
+    Returns:
+        tuple: (dict of format -> bytes per game, dict of name -> rate)
+    """
+    recorded = random_games(game, distinct, seed=seed)
+    plies = sum(len(moves) for _, moves in recorded)
+    write_game = pgn.write_game if game == CHESS else pdn.write_game
+    sizes = {"text": 0, "pickled game states": 0}
+    for start_state, moves in recorded:
+        text = io.StringIO()
+        write_game(text, start_state, moves)
+        sizes["text"] += len(text.getvalue().encode()) / distinct
+        # a snapshot before every move, as the game drivers used to keep
+        game_state = copy.deepcopy(start_state)
+        for move in moves:
+            sizes["pickled game states"] += len(pickle.dumps(game_state)) / distinct
+            replay_move(game_state, move)
+
+    rates = {}
+    handle, path = tempfile.mkstemp(suffix=".games")
+    os.close(handle)
+    try:
+        start = time.perf_counter()
+        with ArchiveWriter(path) as writer:
+            for i in range(games):
+                start_state, moves = recorded[i % distinct]
+                writer.write_game(start_state, moves)
+        rates["write games/s"] = games / (time.perf_counter() - start)
+        sizes["archive and index"] = (os.path.getsize(path) + os.path.getsize(index_path(path))) / games
+
+        rng = random.Random(seed)
+        with GameArchive(path) as archive:
+            start = time.perf_counter()
+            for _ in range(lookups):
+                n = rng.randrange(len(archive))
+                archive.state_at(n, rng.randrange(archive[n].plies + 1))
+            rates["state_at/s"] = lookups / (time.perf_counter() - start)
+
+            game_state = new_game_state(game)
+            replayed_plies = 0
+            start = time.perf_counter()
+            for n in range(min(replayed, games)):
+                for _ in archive[n].replay(game_state=game_state):
+                    replayed_plies += 1
+            rates["replay plies/s"] = replayed_plies / (time.perf_counter() - start)
+    finally:
+        os.remove(path)
+        os.remove(index_path(path))
+    sizes["plies"] = plies / distinct
+    return sizes, rates
+
+
+def bench_position_db(game, games=2000, distinct=200, queries=2000, workers=None, seed=0):
+    """Times building a position database from an archive of seeded random games and querying it
+
+    The distinct games are repeated with random results up to the number of games, so positions are reached many times.
+
+    Returns:
+        dict: name -> figure
+    """
+    rng = random.Random(seed)
+    recorded = random_games(game, distinct, max_plies=100, seed=seed)
+    results = ("1-0", "0-1", "1/2-1/2")
+    handle, path = tempfile.mkstemp(suffix=".games")
+    os.close(handle)
+    db_path = path + ".db"
+    try:
+        with ArchiveWriter(path) as writer:
+            for i in range(games):
+                start_state, moves = recorded[i % distinct]
+                writer.write_game(start_state, moves, results[rng.randrange(len(results))])
+
+        start = time.perf_counter()
+        positions = build(path, db_path, workers)
+        elapsed = time.perf_counter() - start
+        figures = {"positions": positions, "build positions/s": positions / elapsed}
+
+        with GameArchive(path) as archive:
+            game_states = [archive[n].state_at(rng.randrange(archive[n].plies + 1)) for n in range(distinct)]
+        with PositionDB(db_path) as db:
+            figures["records"] = len(db)
+            figures["db bytes"] = os.path.getsize(db_path)
+            start = time.perf_counter()
+            for i in range(queries):
+                db.query(game_states[i % distinct])
+            figures["queries/s"] = queries / (time.perf_counter() - start)
+    finally:
+        for name in (path, index_path(path), db_path):
+            if os.path.exists(name):
+                os.remove(name)
+    return figures
+
+
+def bench_pgn(games=10000, distinct=50, replayed=200, seed=0):
+    """Times writing PGN, and streaming and replaying a synthetic PGN file of seeded random games
+
+    The distinct games are written once and repeated up to the number of games in a temporary file.
+
+    Returns:
+        dict: name -> (games per second, extra figure) where the extra figure is MB/s for reading,
+            plies/s for replaying and the peak KB held while streaming the whole file
+    """
+    recorded = random_games(CHESS, distinct, seed=seed)
+    rates = {}
+    texts = []
+    start = time.perf_counter()
+    for i, (start_state, moves) in enumerate(recorded):
+        output = io.StringIO()
+        pgn.write_game(output, start_state, moves, {"Event": "Benchmark", "Round": i + 1})
+        texts.append(output.getvalue())
+    rates["write"] = (distinct / (time.perf_counter() - start), None)
+
+    handle, path = tempfile.mkstemp(suffix=".pgn")
+    try:
+        with os.fdopen(handle, "w") as output:
+            for i in range(games):
+                output.write(texts[i % distinct])
+        megabytes = os.path.getsize(path) / 1e6
+
+        start = time.perf_counter()
+        with open(path) as lines:
+            count = sum(1 for _ in pgn.read_games(lines))
+        elapsed = time.perf_counter() - start
+        rates["read"] = (count / elapsed, megabytes / elapsed)
+
+        tracemalloc.start()
+        with open(path) as lines:
+            for _ in pgn.read_games(lines):
+                pass
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rates["read peak memory"] = (None, peak / 1024)
+
+        game_state = from_fen(START_FEN)
+        plies = 0
+        start = time.perf_counter()
+        with open(path) as lines:
+            for i, game in zip(range(replayed), pgn.read_games(lines)):
+                for _ in game.replay(game_state=game_state):
+                    plies += 1
+        elapsed = time.perf_counter() - start
+        rates["read + replay"] = (min(replayed, games) / elapsed, plies / elapsed)
+    finally:
+        os.remove(path)
+    return rates
+
+
+def bench_search(game, depth, seed=0, tt_size_mb=TT_SIZE_MB, move_ordering=True, quiescence=True):
+    """Runs one fixed-depth MiniMax search from the starting position
+
+    Returns:
+        tuple: (nodes searched, seconds elapsed, player used for the search)
+    """
+    random.seed(seed)
+    game_state = new_game_state(game)
+    player = MiniMax(depth, tt_size_mb=tt_size_mb, move_ordering=move_ordering, quiescence=quiescence)
+    player.side = game_state.current_side
+    start = time.perf_counter()
+    player.doSearch(game_state, depth, [LOSS, None], [WIN, None])
+    elapsed = time.perf_counter() - start
+    return player.nodes, elapsed, player
+
+
+class FullListCounter(MoveOrderer):
+    "Move orderer that also counts the moves all_possible_moves would have generated at each staged position"
+
+    def __init__(self):
+        super().__init__()
+        self.full = 0
+
+    def staged_moves(self, game_state, ply, hash_move=None):
+        self.full += len(game_state.all_possible_moves())
+        return super().staged_moves(game_state, ply, hash_move)
+
+
+def bench_staged(game, depth, lines):
+    """Runs fixed-depth searches over a set of positions and counts the moves staged generation produced
+
+    Returns:
+        tuple: (nodes searched, seconds elapsed, move orderer stats, moves in the full move lists of the staged positions)
+    """
+    nodes = 0
+    elapsed = 0
+    counter = FullListCounter()
+    for line in lines:
+        for ordering in (MoveOrderer(), counter):
+            random.seed(0)
+            game_state = replay(game, line)
+            player = MiniMax(depth)
+            player.side = game_state.current_side
+            player.ordering = ordering
+            start = time.perf_counter()
+            player.doSearch(game_state, depth, [LOSS, None], [WIN, None])
+            if ordering is not counter:
+                # only the searches without the counter's extra move generation are timed
+                elapsed += time.perf_counter() - start
+                nodes += player.nodes
+    return nodes, elapsed, counter.stats(), counter.full
+
+
+def bench_terminal(game, lines, repeat=200):
+    """Times the terminal tests MiniMax.doSearch runs at every node over a set of positions
+
+    Returns:
+        tuple: (seconds per check_loss call, seconds per check_draw call)
+    """
+    states = [replay(game, line) for line in lines]
+    timings = []
+    for check in ("check_loss", "check_draw"):
+        start = time.perf_counter()
+        for game_state in states:
+            test = getattr(game_state, check)
+            for _ in range(repeat):
+                # forget the cached moves and checks so that every call tests the position from scratch,
+                # as doSearch does at each new node
+                game_state._position_cache.clear()
+                test()
+        timings.append((time.perf_counter() - start) / (len(states) * repeat))
+    return tuple(timings)
+
+
+def bench_parallel(game, depth, worker_counts=(1, 2, 4, 8, 16)):
+    """Times fixed-depth root-split searches against the serial search on a few positions
+
+    Prints, for each worker count, the total time, speedup over the serial search and whether
+    every best score matched the serial search.
+    """
+    lines = [[]] + sample_positions(game, games=3, plies=24, first_ply=12)[::12]
+    serial_scores = []
+    start = time.perf_counter()
+    for line in lines:
+        game_state = replay(game, line)
+        player = MiniMax(depth)
+        player.side = game_state.current_side
+        serial_scores.append(player.doSearch(game_state, depth, [LOSS, None], [WIN, None])[0])
+    serial = time.perf_counter() - start
+    print(f"{game} depth {depth} serial: {len(lines)} positions {serial:.2f}s")
+
+    for workers in worker_counts:
+        player = ParallelMiniMax(depth, workers)
+        scores = []
+        nodes = 0
+        start = time.perf_counter()
+        for line in lines:
+            game_state = replay(game, line)
+            player.side = game_state.current_side
+            scores.append(player.parallel_search(game_state)[0])
+            nodes += player.nodes
+        elapsed = time.perf_counter() - start
+        player.close()
+        print(f"{game} depth {depth} {workers:>2} workers: {elapsed:8.2f}s speedup {serial / elapsed:5.2f} "
+              f"{nodes:>10} nodes scores {'match' if scores == serial_scores else 'DIFFER'}")
+
+
+def report(label, nodes, elapsed):
+    print(f"{label:<42} {nodes:>10} nodes {elapsed:>8.2f}s {nodes / max(elapsed, 1e-9):>10.0f} nodes/s")
+
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else "search"
+    games = [CHESS, CHECKERS]
+    if len(argv) > 2 and argv[2] in games:
+        games = [argv[2]]
+        argv = argv[:2] + argv[3:]
+
+    if command == "search":
+        depths = [int(d) for d in argv[2:]] or [3, 4, 5]
+        for game in games:
+            for depth in depths:
+                configs = ((0, False, False), (TT_SIZE_MB, False, False), (TT_SIZE_MB, True, False),
+                           (TT_SIZE_MB, True, True))
+                for tt_size_mb, move_ordering, quiescence in configs:
+                    nodes, elapsed, player = bench_search(game, depth, tt_size_mb=tt_size_mb,
+                                                          move_ordering=move_ordering, quiescence=quiescence)
+                    label = f"{game} depth {depth} tt {tt_size_mb}MB" + (" ordered" if move_ordering else "") + \
+                        (" quiescence" if quiescence else "")
+                    report(label, nodes, elapsed)
+                    if quiescence:
+                        print("    quiescence nodes", player.q_nodes)
+                    if player.tt:
+                        print("    tt", player.tt.stats())
+                    if player.ordering:
+                        print("    ordering", player.ordering.stats())
+    elif command == "movegen":
+        for game in games:
+            position_sets = [("start", [[]]), ("middlegame", sample_positions(game, first_ply=10))]
+            for name, lines in position_sets:
+                for board_class in (Board, BitBoard):
+                    repeat = 1000 if name == "start" else 20
+                    lists, moves, elapsed = bench_movegen(game, board_class, lines, repeat)
+                    label = f"{game} {name} {board_class.__name__}"
+                    print(f"{label:<36} {lists:>10} lists {elapsed:>8.2f}s "
+                          f"{lists / elapsed:>10.0f} lists/s {moves / elapsed:>10.0f} moves/s")
+    elif command == "moves":
+        for game in games:
+            lines = sample_positions(game, first_ply=10)
+            for board_class in (Board, BitBoard):
+                moves, held, allocated = bench_move_memory(game, board_class, lines)
+                _, generated, elapsed = bench_movegen(game, board_class, lines)
+                label = f"{game} middlegame {board_class.__name__}"
+                print(f"{label:<36} {moves:>8} moves {held / moves:>8.1f} bytes/move "
+                      f"{allocated / moves:>8.1f} bytes kept/execute+undo {generated / elapsed:>10.0f} moves/s")
+    elif command == "board":
+        for game in games:
+            for board_class in (Board, BitBoard):
+                size, pickled, copy_time = bench_board_memory(game, board_class)
+                label = f"{game} {board_class.__name__}"
+                print(f"{label:<36} {size:>8} bytes {pickled:>8} bytes pickled {copy_time * 1e3:>8.2f}ms deepcopy")
+    elif command == "history":
+        for game in games:
+            configs = (("deepcopy snapshots", None, True), ("moves", None, False), ("moves, keyframes every 50", 50, False))
+            for name, keyframe_interval, snapshots in configs:
+                size, lookup = bench_history(game, keyframe_interval=keyframe_interval, snapshots=snapshots)
+                label = f"{game} {name}"
+                print(f"{label:<36} {size / 1024:>10.1f}KB per 1000 plies" +
+                      (f" {lookup * 1e3:>8.2f}ms per state_at" if lookup is not None else ""))
+    elif command == "fen":
+        rates = bench_fen(int(argv[2]) if len(argv) > 2 else 100000)
+        for name, rate in rates.items():
+            print(f"{name:<12} {rate:>10.0f} FENs/s")
+    elif command == "pgn":
+        rates = bench_pgn(int(argv[2]) if len(argv) > 2 else 10000)
+        units = {"read": "MB/s", "read + replay": "plies/s", "read peak memory": "KB"}
+        for name, (rate, extra) in rates.items():
+            print(f"{name:<18}" + (f" {rate:>10.0f} games/s" if rate is not None else " " * 18) +
+                  (f" {extra:>10.1f} {units[name]}" if extra is not None else ""))
+    elif command == "archive":
+        for game in games:
+            sizes, rates = bench_archive(game, int(argv[2]) if len(argv) > 2 else 2000)
+            plies = sizes.pop("plies")
+            print(f"{game}: {plies:.0f} plies per game")
+            for name, size in sizes.items():
+                print(f"    {name:<22} {size:>10.0f} bytes/game {size / plies:>10.1f} bytes/ply")
+            for name, rate in rates.items():
+                print(f"    {name:<22} {rate:>10.0f}")
+    elif command == "positions":
+        for game in games:
+            figures = bench_position_db(game, int(argv[2]) if len(argv) > 2 else 2000)
+            print(game + ": " + ", ".join(f"{name} {value:.0f}" for name, value in figures.items()))
+    elif command == "terminal":
+        for game in games:
+            position_sets = [("start", [[]]), ("middlegame", sample_positions(game, first_ply=10))]
+            for name, lines in position_sets:
+                loss, draw = bench_terminal(game, lines)
+                label = f"{game} {name}"
+                print(f"{label:<36} check_loss {loss * 1e6:>8.2f}us check_draw {draw * 1e6:>8.2f}us "
+                      f"per node {(loss + draw) * 1e6:>8.2f}us")
+    elif command == "staged":
+        for game in games:
+            depth = int(argv[2]) if len(argv) > 2 else (3 if game == CHESS else 6)
+            lines = sample_positions(game, games=4, plies=40, first_ply=10)[::5]
+            nodes, elapsed, stats, full = bench_staged(game, depth, lines)
+            report(f"{game} depth {depth} middlegame", nodes, elapsed)
+            print(f"    {stats['staged_positions']} staged positions, {stats['quiet_stages']} reached the quiet moves, "
+                  f"{stats['generated']} moves generated of {full} in the full lists "
+                  f"({100 * stats['generated'] / max(full, 1):.1f}%)")
+    elif command == "parallel":
+        for game in games:
+            depth = int(argv[2]) if len(argv) > 2 else (4 if game == CHESS else 6)
+            bench_parallel(game, depth)
+    else:
+        print(__doc__)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
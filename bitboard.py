@@ -0,0 +1,119 @@
+from board import Board
+from constants import BLACK, WHITE
+
+
+def iterate_bits(mask):
+    "Yields the square index of every set bit in a mask, lowest first"
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BitBoard(Board):
+    """
+    Board that also keeps an integer bitmask of occupied squares per side and per (piece type, side).
+    Square index is row * size + col, so bit 0 is a1 and "n" is a shift by -size.
+
+    The Space objects are still kept up to date so the rest of the game code works unchanged,
+    while pieces can use the masks and shift helpers below for move generation.
+    """
+    bitboards = True
+
+    def __init__(self, size, factory, piece_square_tables=None):
+        super().__init__(size, factory, piece_square_tables)
+        self._full = (1 << (size * size)) - 1
+
+        file_first = 0
+        file_last = 0
+        for row in range(size):
+            file_first |= 1 << (row * size)
+            file_last |= 1 << (row * size + size - 1)
+        not_first = self._full & ~file_first
+        not_last = self._full & ~file_last
+
+        # direction -> (shift amount where positive is a left shift, mask of squares that may move that way)
+        self._shifts = {
+            "n": (-size, self._full),
+            "s": (size, self._full),
+            "e": (1, not_last),
+            "w": (-1, not_first),
+            "ne": (1 - size, not_last),
+            "nw": (-1 - size, not_first),
+            "se": (size + 1, not_last),
+            "sw": (size - 1, not_first),
+        }
+
+        self._side_masks = {WHITE: 0, BLACK: 0}
+        self._type_masks = {}
+
+    def pieces_placed(self):
+        super().pieces_placed()
+        self._side_masks = {WHITE: 0, BLACK: 0}
+        self._type_masks = {}
+        for space in self._spaces:
+            if space.piece:
+                self._toggle_masks(space.piece, space)
+
+    def toggle_piece(self, piece, space):
+        super().toggle_piece(piece, space)
+        self._toggle_masks(piece, space)
+
+    def _toggle_masks(self, piece, space):
+        bit = 1 << (space.row * self._size + space.col)
+        self._side_masks[piece.side] ^= bit
+        key = (type(piece), piece.side)
+        self._type_masks[key] = self._type_masks.get(key, 0) ^ bit
+
+    def side_mask(self, side):
+        "Mask of squares occupied by the given side"
+        return self._side_masks[side]
+
+    def type_mask(self, piece_type, side):
+        "Mask of squares occupied by pieces of exactly the given class for the given side"
+        return self._type_masks.get((piece_type, side), 0)
+
+    def empty_mask(self):
+        return self._full & ~(self._side_masks[WHITE] | self._side_masks[BLACK])
+
+    def bit(self, space):
+        return 1 << (space.row * self._size + space.col)
+
+    def shift(self, mask, dir):
+        """Moves every set bit one step in a direction, dropping bits that would leave the board
+
+        Args:
+            mask (int): squares to move
+            dir (string): Either "n", "e", "s", "w", "ne", "se", "sw", or "nw"
+        """
+        amount, allowed = self._shifts[dir]
+        mask &= allowed
+        if amount > 0:
+            return (mask << amount) & self._full
+        return mask >> -amount
+
+    def slide(self, mask, dir, empty):
+        """Squares reached by sliding from mask in a direction through empty squares,
+        including the first occupied square of each ray (which may be a capture or a friendly piece)
+        """
+        amount, allowed = self._shifts[dir]
+        full = self._full
+        fill = mask
+        while True:
+            if amount > 0:
+                step = ((fill & allowed) << amount) & full
+            else:
+                step = (fill & allowed) >> -amount
+            grown = fill | (step & empty)
+            if grown == fill:
+                return step
+            fill = grown
+
+    def pieces_iterator(self, side=None):
+        "Iterator over pieces for the given side, or all pieces if side is omitted or None, using the occupancy masks"
+        if side is None:
+            mask = self._side_masks[WHITE] | self._side_masks[BLACK]
+        else:
+            mask = self._side_masks[side]
+        for square in iterate_bits(mask):
+            yield self._spaces[square].piece
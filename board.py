@@ -19,7 +19,65 @@
 # ⚉
 
 
-from constants import ALPHABET
+from constants import ALPHABET, BLACK, WHITE
+from evaluation import piece_score
+from zobrist import piece_key
+
+
+# (row, col) step for each direction name used by pieces
+DIRECTIONS = {
+    "n": (-1, 0),
+    "e": (0, 1),
+    "s": (1, 0),
+    "w": (0, -1),
+    "ne": (-1, 1),
+    "se": (1, 1),
+    "sw": (1, -1),
+    "nw": (-1, -1),
+}
+# knight jumps: two steps n, e, s and w, each followed by a turn to either side
+KNIGHT_JUMPS = ((-2, 1), (-2, -1), (1, 2), (-1, 2), (2, -1), (2, 1), (-1, -2), (1, -2))
+KING_DIRECTIONS = ("n", "s", "e", "w", "ne", "nw", "se", "sw")
+
+# board size -> tables returned by move_tables
+_move_tables = {}
+
+
+def move_tables(size):
+    """Square index tables for a board size, computed once and shared by every board of that size.
+    Squares are numbered row * size + col.
+
+    Returns:
+        tuple: (rays, knight, king) where rays[dir][square] is a tuple of the squares walked from square in
+            direction dir up to the edge of the board, and knight[square] and king[square] are tuples of the
+            squares a knight or king on square can reach
+    """
+    if size in _move_tables:
+        return _move_tables[size]
+
+    def on_board(row, col):
+        return 0 <= row < size and 0 <= col < size
+
+    rays = {}
+    for dir, (dr, dc) in DIRECTIONS.items():
+        rays[dir] = []
+        for row in range(size):
+            for col in range(size):
+                ray = []
+                r, c = row + dr, col + dc
+                while on_board(r, c):
+                    ray.append(r * size + c)
+                    r, c = r + dr, c + dc
+                rays[dir].append(tuple(ray))
+    knight = []
+    king = []
+    for row in range(size):
+        for col in range(size):
+            knight.append(tuple((row + dr) * size + col + dc for dr, dc in KNIGHT_JUMPS if on_board(row + dr, col + dc)))
+            king.append(tuple(rays[dir][row * size + col][0] for dir in KING_DIRECTIONS if rays[dir][row * size + col]))
+
+    _move_tables[size] = (rays, knight, king)
+    return _move_tables[size]
 
 
 def convert_checker_coord(coord):
@@ -36,6 +94,8 @@ def convert_matrix_coord(coord):
 
 
 class Space:
+    __slots__ = ("_row", "_col", "_piece")
+
     def __init__(self, row, col, p=None):
         # row and col are read only properties
         self._row = row
@@ -87,28 +147,161 @@ class Space:
 
 
 class Board:
-    def __init__(self, size, factory):
+    # whether this board keeps bitboards that pieces can use for move generation
+    bitboards = False
+
+    def __init__(self, size, factory, piece_square_tables=None):
         """
         Args:
             size (int): number of rows and columns in the board
             factory (PieceFactory): concrete piece factory to set up the board for a particular game
+            piece_square_tables (PieceSquareTables, optional): tables for the incremental evaluation.
+                Defaults to the factory's tables, which are ignored if they were written for another board size.
         """
         self._board = [[Space(i, j) for j in range(size)] for i in range(size)]
         self._factory = factory
-
+        self._spaces = [space for row in self._board for space in row]
         # read only property
         self._size = size
+        self._build_lookups()
+        # zobrist key of the pieces on the board, kept up to date by Move.execute and Move.undo
+        self._zobrist_key = 0
+
+        if piece_square_tables is None:
+            piece_square_tables = factory.piece_square_tables
+        if piece_square_tables and piece_square_tables.size != size:
+            piece_square_tables = None
+        self._piece_square_tables = piece_square_tables
+        # side -> material plus piece-square score of its pieces, kept up to date like the zobrist key
+        self._scores = {WHITE: 0, BLACK: 0}
+        # side -> {square: piece} and (piece class, side) -> {square: piece} for the pieces on the board,
+        # kept up to date the same way so that iterating over pieces never visits empty spaces
+        self._side_pieces = {WHITE: {}, BLACK: {}}
+        self._type_pieces = {}
+        # side -> space of its royal piece (the chess king), or None if it has none on the board
+        self._king_spaces = {WHITE: None, BLACK: None}
+
+    def _build_lookups(self):
+        "Builds per space lookups from the shared square tables so move generation never recomputes bounds"
+        rays, knight, king = move_tables(self._size)
+        spaces = self._spaces
+        self._rays = {}
+        self._knight_targets = {}
+        self._king_targets = {}
+        for i, space in enumerate(spaces):
+            self._rays[space] = {dir: tuple(spaces[j] for j in rays[dir][i]) for dir in DIRECTIONS}
+            self._knight_targets[space] = tuple(spaces[j] for j in knight[i])
+            self._king_targets[space] = tuple(spaces[j] for j in king[i])
+
+    def __getstate__(self):
+        # the lookups only depend on the spaces, so copies and pickles rebuild them instead of carrying them
+        state = self.__dict__.copy()
+        del state["_rays"], state["_knight_targets"], state["_king_targets"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_lookups()
 
     @property
     def size(self):
         return self._size
 
+    @property
+    def zobrist_key(self):
+        return self._zobrist_key
+
+    @property
+    def piece_square_tables(self):
+        return self._piece_square_tables
+
     def set_up(self):
         "Uses an abstract piece factory to set up all spaces in the board"
         for x in range(self._size):
             for y in range(self._size):
                 p = self._factory.create_piece(self, self._board[x][y])
                 self._board[x][y].piece = p
+        self.pieces_placed()
+
+    def clear(self):
+        "Takes every piece off the spaces, so that a position can be placed on them directly followed by pieces_placed"
+        for space in self._spaces:
+            space.piece = None
+
+    def pieces_placed(self):
+        """Recomputes everything the board keeps about its pieces, such as the zobrist key, scores and piece lists,
+        after pieces were put on the spaces directly rather than by moves
+        """
+        # one pass doing the work of compute_zobrist_key and compute_scores, since loading positions in bulk calls this a lot
+        key = 0
+        scores = {WHITE: 0, BLACK: 0}
+        tables = self._piece_square_tables
+        self._side_pieces = {WHITE: {}, BLACK: {}}
+        self._type_pieces = {}
+        self._king_spaces = {WHITE: None, BLACK: None}
+        for space in self._spaces:
+            piece = space.piece
+            if piece:
+                key ^= piece_key(piece, space)
+                scores[piece.side] += piece_score(piece, space, tables)
+                self._list_piece(piece, space)
+        self._zobrist_key = key
+        self._scores = scores
+
+    def compute_zobrist_key(self):
+        "Computes the zobrist key of the pieces on the board from scratch"
+        key = 0
+        for space in self:
+            if space.piece:
+                key ^= piece_key(space.piece, space)
+        return key
+
+    def compute_scores(self):
+        "Computes the score of each side from scratch, as a dict of side -> score"
+        scores = {WHITE: 0, BLACK: 0}
+        for space in self:
+            if space.piece:
+                scores[space.piece.side] += piece_score(space.piece, space, self._piece_square_tables)
+        return scores
+
+    def score(self, side):
+        "Material plus piece-square score of the given side minus that of its opponent, in evaluation units"
+        return self._scores[side] - self._scores[not side]
+
+    def toggle_piece(self, piece, space):
+        """Records that a piece was placed on or removed from a space (the operation is its own inverse)
+
+        Called through piece_added and piece_removed so that derived state such as the
+        zobrist key stays in sync with the spaces.
+        """
+        self._zobrist_key ^= piece_key(piece, space)
+
+    def piece_added(self, piece, space):
+        """Records that a piece was placed on a space
+
+        Called by Move.execute and Move.undo after every piece placed so the zobrist key
+        and scores stay in sync with the spaces.
+        """
+        self.toggle_piece(piece, space)
+        self._scores[piece.side] += piece_score(piece, space, self._piece_square_tables)
+        self._list_piece(piece, space)
+
+    def piece_removed(self, piece, space):
+        "Records that a piece was taken off a space, the inverse of piece_added"
+        self.toggle_piece(piece, space)
+        self._scores[piece.side] -= piece_score(piece, space, self._piece_square_tables)
+        square = space.row * self._size + space.col
+        del self._side_pieces[piece.side][square]
+        del self._type_pieces[(type(piece), piece.side)][square]
+        if piece.royal and self._king_spaces[piece.side] is space:
+            self._king_spaces[piece.side] = None
+
+    def _list_piece(self, piece, space):
+        square = space.row * self._size + space.col
+        self._side_pieces[piece.side][square] = piece
+        self._type_pieces.setdefault((type(piece), piece.side), {})[square] = piece
+        if piece.royal:
+            self._king_spaces[piece.side] = space
 
     def get_space(self, coord):
         "Gets the space in the board for the given coordinate such as b5 or a1"
@@ -185,7 +378,7 @@ class Board:
             None
 
     def get_dir(self, space, dir) -> Space:
-        """Takes in a space and a direction and delegates to the proper directional method
+        """Takes in a space and a direction and looks up the neighbouring space in the precomputed rays
 
         Args:
             space (Space): origin space
@@ -194,14 +387,57 @@ class Board:
         Returns:
             Space: the space in the given direction from the origin space or None if that space is off the board
         """
-        return getattr(self, dir)(space)
+        ray = self._rays[space][dir]
+        return ray[0] if ray else None
+
+    def rays(self, space):
+        """Precomputed rays from a space
+
+        Returns:
+            dict: direction -> tuple of the spaces walked from space in that direction up to the edge of the board
+        """
+        return self._rays[space]
+
+    def knight_targets(self, space):
+        "Tuple of the spaces a knight on the given space can reach"
+        return self._knight_targets[space]
+
+    def king_targets(self, space):
+        "Tuple of the spaces one step away from the given space in any direction"
+        return self._king_targets[space]
+
+    def square(self, space):
+        "Index of a space counting along the rows from the top left, the inverse of space_at"
+        return space.row * self._size + space.col
+
+    def space_at(self, square):
+        "Space for a square index"
+        return self._spaces[square]
 
     def pieces_iterator(self, side=None):
-        "Iterator over pieces for the given side, or all pieces if side is omitted or None"
-        for space in self:
-            if space.piece:
-                if side == None or space.piece.side == side:
-                    yield space.piece
+        """Iterator over pieces for the given side, or all pieces if side is omitted or None
+
+        Pieces come from the piece lists rather than a scan of the board, but are still
+        in board order so the moves generated for a position do not depend on how it was reached.
+        """
+        if side is None:
+            pieces = {**self._side_pieces[WHITE], **self._side_pieces[BLACK]}
+        else:
+            pieces = self._side_pieces[side]
+        return iter([pieces[square] for square in sorted(pieces)])
+
+    def pieces_of_type(self, piece_type, side):
+        "List of the pieces of exactly the given class for the given side, in board order"
+        pieces = self._type_pieces.get((piece_type, side), {})
+        return [pieces[square] for square in sorted(pieces)]
+
+    def king_space(self, side):
+        "Space of the given side's royal piece, such as the chess king, or None if it has none on the board"
+        return self._king_spaces[side]
+
+    def piece_count(self, side):
+        "Number of pieces the given side has on the board"
+        return len(self._side_pieces[side])
 
     def __iter__(self):
         "Iterator over all spaces in the board"
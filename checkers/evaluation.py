@@ -0,0 +1,26 @@
+from evaluation import PieceSquareTables
+
+# checkers gain value as they near promotion and while they guard the back row,
+# kings are worth more in the centre where they reach the most squares
+CHECKERS_TABLES = PieceSquareTables({
+    "Checker": [
+        [0, 0, 0, 0, 0, 0, 0, 0],
+        [30, 30, 30, 30, 30, 30, 30, 30],
+        [20, 20, 20, 20, 20, 20, 20, 20],
+        [8, 12, 14, 16, 16, 14, 12, 8],
+        [4, 8, 10, 12, 12, 10, 8, 4],
+        [0, 4, 6, 6, 6, 6, 4, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0],
+        [10, 10, 10, 10, 10, 10, 10, 10],
+    ],
+    "KingChecker": [
+        [-10, -5, -5, -5, -5, -5, -5, -10],
+        [-5, 0, 0, 0, 0, 0, 0, -5],
+        [-5, 0, 5, 5, 5, 5, 0, -5],
+        [-5, 0, 5, 10, 10, 5, 0, -5],
+        [-5, 0, 5, 10, 10, 5, 0, -5],
+        [-5, 0, 5, 5, 5, 5, 0, -5],
+        [-5, 0, 0, 0, 0, 0, 0, -5],
+        [-10, -5, -5, -5, -5, -5, -5, -10],
+    ],
+})
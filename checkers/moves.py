@@ -1,6 +1,8 @@
 from move import Move
 
 class CheckersMove(Move):
+    __slots__ = ()
+
     def __repr__(self):
         return str(self)
 
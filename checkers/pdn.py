@@ -0,0 +1,214 @@
+"""
+PDN (Portable Draughts Notation) positions and games for checkers
+
+Squares are numbered 1 to 32 as in English draughts, row by row from black's back row.
+This board is the mirror image of the standard one, with its single corner on the other side,
+so each row is numbered from the right. Colours are kept as they are: squares 1-12 start with
+black's pieces and 21-32 with white's. Standard games start with black to move while games
+played here start with white, so the side to move is always part of a position.
+
+Positions use the PDN FEN tag syntax, such as "B:W21-32:B1-12,K15", with K marking kings.
+Moves are written with their squares separated by "-" for basic moves and "x" for jumps,
+listing every square landed on, such as "27x18x11" for a double jump. Jumps are also read when
+written as only their start and end squares.
+"""
+import re
+
+from constants import BLACK, BOARD_SIZE, WHITE
+from board import Board
+from notation import GameRecord, read_records, write_record
+from checkers.pieces import CheckerFactory, Checker, KingChecker
+from checkers.game_state import CheckersGameState
+
+PDN_SIZE = 8
+START_FEN = "B:W21,22,23,24,25,26,27,28,29,30,31,32:B1,2,3,4,5,6,7,8,9,10,11,12"
+SIDES = {"W": WHITE, "B": BLACK}
+SIDE_LETTERS = {WHITE: "W", BLACK: "B"}
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*", "2-0", "0-2", "1-1", "0-0")
+
+_MOVE = re.compile(r"(\d+)((?:[-x]\d+)+)[!?]*$")
+
+
+def _number(row, col):
+    return row * 4 + (PDN_SIZE - 1 - col) // 2 + 1
+
+
+def square_number(space):
+    "PDN number of a dark space"
+    return _number(space.row, space.col)
+
+
+def space_for(board, number):
+    "Space of the board with the given PDN number"
+    if not 1 <= number <= 32:
+        raise ValueError(f"{number} is not a square number")
+    row = (number - 1) // 4
+    col = PDN_SIZE - 1 - (2 * ((number - 1) % 4) + (row + 1) % 2)
+    return board.space_at(row * PDN_SIZE + col)
+
+
+def _check_size(board):
+    if board.size != PDN_SIZE:
+        raise ValueError(f"PDN square numbers are for {PDN_SIZE}x{PDN_SIZE} boards")
+
+
+def load_fen(game_state, fen):
+    """Replaces the position of an existing checkers game state with the one in a PDN FEN string
+
+    Raises:
+        ValueError: if the string is not a valid position
+    """
+    board = game_state.board
+    _check_size(board)
+    fields = fen.strip().rstrip(".").split(":")
+    side = SIDES.get(fields[0].strip().upper())
+    if side is None:
+        raise ValueError(f"invalid FEN {fen!r}: side to move must be W or B")
+    placements = {}
+    for field in fields[1:]:
+        field = field.strip()
+        if not field:
+            continue
+        colour = SIDES.get(field[0].upper())
+        if colour is None:
+            raise ValueError(f"invalid FEN {fen!r}: piece lists must start with W or B")
+        for item in field[1:].split(","):
+            item = item.strip()
+            if not item:
+                continue
+            piece_class = Checker
+            if item[0].upper() == "K":
+                piece_class = KingChecker
+                item = item[1:]
+            try:
+                first, _, last = item.partition("-")
+                numbers = range(int(first), int(last or first) + 1)
+            except ValueError:
+                raise ValueError(f"invalid FEN {fen!r}: {item!r} is not a square or range") from None
+            for number in numbers:
+                if not 1 <= number <= 32:
+                    raise ValueError(f"invalid FEN {fen!r}: {number} is not a square number")
+                placements[number] = (piece_class, colour)
+
+    board.clear()
+    for number, (piece_class, colour) in placements.items():
+        space = space_for(board, number)
+        space.piece = piece_class(colour, board, space)
+    board.pieces_placed()
+
+    game_state._current_side = side
+    game_state._turn_counter = 1
+    game_state.draw_counter = 0
+    game_state._position_cache.clear()
+
+
+def from_fen(fen=START_FEN, board_class=Board):
+    "Returns a new checkers game state in the position given by a PDN FEN string, by default the standard start"
+    game_state = CheckersGameState(board_class(int(BOARD_SIZE), CheckerFactory()), WHITE, None)
+    load_fen(game_state, fen)
+    return game_state
+
+
+def to_fen(game_state):
+    "PDN FEN string for the position of a checkers game state"
+    board = game_state.board
+    _check_size(board)
+    lists = {WHITE: [], BLACK: []}
+    for piece in board.pieces_iterator():
+        number = square_number(piece._current_space)
+        lists[piece.side].append((number, "K" if type(piece) is KingChecker else ""))
+    fields = [SIDE_LETTERS[game_state.current_side]]
+    for side in (WHITE, BLACK):
+        fields.append(SIDE_LETTERS[side] + ",".join(f"{king}{number}" for number, king in sorted(lists[side])))
+    return ":".join(fields)
+
+
+def move_text(move):
+    "PDN text of a move, listing every square landed on for jumps"
+    if not move._captures:
+        return f"{square_number(move._start)}-{square_number(move._end)}"
+    squares = [square_number(move._start)]
+    row, col = move._start.row, move._start.col
+    for cap in move._captures:
+        # each jump lands just past the piece it captures
+        row, col = 2 * cap.row - row, 2 * cap.col - col
+        squares.append(_number(row, col))
+    return "x".join(str(number) for number in squares)
+
+
+def find_move(game_state, text):
+    """Finds the current side's move for its PDN text
+
+    Raises:
+        ValueError: if the text is not a move or does not match exactly one legal move
+    """
+    match = _MOVE.match(text)
+    if not match:
+        raise ValueError(f"{text!r} is not a PDN move")
+    squares = [int(number) for number in re.split(r"[-x]", text.rstrip("!?"))]
+    options = game_state.all_possible_moves()
+    if len(squares) > 2:
+        matches = [m for m in options if m._captures and move_text(m) == "x".join(map(str, squares))]
+    else:
+        matches = [m for m in options
+                   if square_number(m._start) == squares[0] and square_number(m._end) == squares[-1]]
+    if len(matches) != 1:
+        raise ValueError(f"{text} matches {len(matches)} moves")
+    return matches[0]
+
+
+class PDNGame(GameRecord):
+    """
+    A checkers game read from PDN: its tags, the text of its moves and its result
+    """
+    start_fen = START_FEN
+    from_fen = staticmethod(from_fen)
+    load_fen = staticmethod(load_fen)
+
+    def replay(self, board_class=Board, game_state=None):
+        """Plays the game on a single game state, yielding each move as it is executed with the game state after it
+
+        Args are as for GameRecord.start.
+
+        Raises:
+            ValueError: if a move is not legal
+        """
+        game_state = self.start(board_class, game_state)
+        for text in self.moves:
+            move = find_move(game_state, text)
+            move.execute(game_state)
+            yield move, game_state
+
+
+def read_games(lines):
+    """Yields a PDNGame for each game in an iterable of lines, such as an open file
+
+    Only the current game is held in memory. Comments, variations and annotations are skipped.
+    """
+    return read_records(lines, RESULTS, PDNGame)
+
+
+def write_game(file, start, moves, tags=None, result="*"):
+    """Writes a game in PDN
+
+    Args:
+        file: text file to write to
+        start (CheckersGameState): game state in the starting position, which is not changed
+        moves (list): Move objects of the game in order, only their squares are used so they may come from any board
+        tags (dict, optional): tag name -> value. Defaults to None.
+        result (str, optional): PDN result such as "1-0". Defaults to "*".
+    """
+    tags = dict(tags or {})
+    tags["Result"] = result
+    fen = to_fen(start)
+    if fen != START_FEN:
+        tags["FEN"] = fen
+
+    tokens = []
+    for i, move in enumerate(moves):
+        # moves are numbered in pairs starting with whichever side moves first
+        if i % 2 == 0:
+            tokens.append(f"{i // 2 + 1}.")
+        tokens.append(move_text(move))
+    tokens.append(result)
+    write_record(file, tags, tokens)
@@ -2,11 +2,15 @@ from piece import Piece
 from piece_factory import PieceFactory
 from constants import BLACK, WHITE
 from checkers.moves import CheckersMove, CheckersMoveSet
+from checkers.evaluation import CHECKERS_TABLES
+from bitboard import iterate_bits
 
 
 class CheckerFactory(PieceFactory):
     "Concrete piece factory for setting up a checkers game"
 
+    piece_square_tables = CHECKERS_TABLES
+
     def create_piece(self, board, space):
         x = space.row
         y = space.col
@@ -20,27 +24,33 @@ class CheckerFactory(PieceFactory):
 class Checker(Piece):
     "Concrete piece class for a basic checker or 'peasant'"
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._val = 1
-        if self._side == WHITE:
-            self._symbol = u"⚆"
-            self._directions = ["ne", "nw"]
-        if self._side == BLACK:
-            self._symbol = u"⚈"
-            self._directions = ["se", "sw"]
-
-    def enumerate_moves(self):
+    __slots__ = ()
+    _val = 1
+    _symbols = {WHITE: u"⚆", BLACK: u"⚈"}
+    # side -> directions a basic checker moves in, towards the opponent's side
+    _side_directions = {WHITE: ("ne", "nw"), BLACK: ("se", "sw")}
+
+    @property
+    def _directions(self):
+        return self._side_directions[self._side]
+
+    def enumerate_moves(self, captures_only=False, quiet_only=False):
+        if self._board.bitboards:
+            return self._enumerate_bitboard_moves(captures_only, quiet_only)
+
         moves = CheckersMoveSet()
 
         # jump moves
         # done first since we can skip singles if we find any jumps
-        self._enumerate_jumps(moves, self._current_space, [])
+        if not quiet_only:
+            self._enumerate_jumps(moves, self._current_space, [])
 
         # basic moves
-        if len(moves) == 0:
+        if len(moves) == 0 and not captures_only:
+            rays = self._board.rays(self._current_space)
             for direction in self._directions:
-                one_step = self._board.get_dir(self._current_space, direction)
+                ray = rays[direction]
+                one_step = ray[0] if ray else None
                 if one_step and one_step.is_free():
                     m = CheckersMove(self._current_space, one_step)
                     moves.append(m)
@@ -60,12 +70,17 @@ class Checker(Piece):
             midjump (bool, optional): flag used to avoid adding moves when no jumps have been made. Defaults to False.
         """
         done_jumping = True
+        rays = self._board.rays(current_space)
         # recursive cases making up to 4 additional branching calls
         for direction in self._directions:
-            one_step = self._board.get_dir(current_space, direction)
-
-            if one_step and not one_step.is_free() and one_step.piece.side != self._side and one_step not in captured:
-                two_steps = self._board.get_dir(one_step, direction)
+            ray = rays[direction]
+            if len(ray) < 2:
+                # no room to land a jump in this direction
+                continue
+            one_step = ray[0]
+
+            if not one_step.is_free() and one_step.piece.side != self._side and one_step not in captured:
+                two_steps = ray[1]
                 if two_steps and two_steps.is_free() or two_steps == self._current_space:
                     # use + creates a shallow copy of captured so that each branch has a different list. the spaces themselves are the same objects
                     self._enumerate_jumps(
@@ -79,6 +94,56 @@ class Checker(Piece):
                 m.add_promotion()
             moves.append(m)
 
+    def _enumerate_bitboard_moves(self, captures_only=False, quiet_only=False):
+        "Same as enumerate_moves but using the masks and shifts of a BitBoard"
+        board = self._board
+        start = board.bit(self._current_space)
+        moves = CheckersMoveSet()
+
+        # the start square counts as empty since the piece leaves it, which allows jumping in a loop
+        if not quiet_only:
+            self._enumerate_bitboard_jumps(moves, start, board.side_mask(not self._side),
+                                           board.empty_mask() | start, [])
+
+        if len(moves) == 0 and not captures_only:
+            targets = 0
+            for direction in self._directions:
+                targets |= board.shift(start, direction)
+            for square in iterate_bits(targets & board.empty_mask()):
+                moves.append(self._bitboard_move(board.space_at(square), []))
+
+        return moves
+
+    def _enumerate_bitboard_jumps(self, moves, current, enemy, empty, captured):
+        """Recursive helper for finding jump moves with bitboards
+
+        Args:
+            moves (CheckersMoveSet): set to which moves are added when found
+            current (int): single bit mask of the square from which jumps are currently being sought
+            enemy (int): mask of opponent pieces that have not been captured yet
+            empty (int): mask of squares that can be landed on
+            captured (list): spaces captured thus far
+        """
+        board = self._board
+        done_jumping = True
+        for direction in self._directions:
+            over = board.shift(current, direction) & enemy
+            if over:
+                land = board.shift(over, direction) & empty
+                if land:
+                    self._enumerate_bitboard_jumps(moves, land, enemy & ~over, empty,
+                                                   captured + [board.space_at(over.bit_length() - 1)])
+                    done_jumping = False
+        if captured and done_jumping:
+            moves.append(self._bitboard_move(board.space_at(current.bit_length() - 1), captured))
+
+    def _bitboard_move(self, end, captured):
+        m = CheckersMove(self._current_space, end, captured)
+        if ((self._side == WHITE and end.row == 0) or
+                (self._side == BLACK and end.row == self._board.size - 1)):
+            m.add_promotion()
+        return m
+
     def promote(self):
         "Overrides promote to return a KingChecker in the same space for the same side"
         return KingChecker(self._side, self._board, self._current_space)
@@ -87,14 +152,10 @@ class Checker(Piece):
 class KingChecker(Checker):
     "Same as a basic checker except that it can move in all 4 directions, has a different symbol, and cannot be promoted further"
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._val = 2
-        self._directions = ["ne", "nw", "se", "sw"]
-        if self._side == WHITE:
-            self._symbol = u"⚇"
-        if self._side == BLACK:
-            self._symbol = u"⚉"
+    __slots__ = ()
+    _val = 2
+    _directions = ("ne", "nw", "se", "sw")
+    _symbols = {WHITE: u"⚇", BLACK: u"⚉"}
 
     def promote(self):
         "Override promote to return self since a king cannot be promoted further"
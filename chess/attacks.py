@@ -0,0 +1,83 @@
+"""
+Attack detection for legal chess move generation
+
+Attacks are found by looking outwards from the square in question along the board's
+precomputed rays and knight targets, so the cost depends on how far the nearest
+pieces are rather than on how many pieces the attacking side has.
+"""
+from constants import BLACK, WHITE
+from chess.pieces import Bishop, King, Knight, Pawn, Queen, Rook
+
+# side -> directions to look in from a square for that side's pawns attacking it
+PAWN_ATTACK_LOOKUPS = {WHITE: ("se", "sw"), BLACK: ("ne", "nw")}
+DIAGONALS = ("ne", "nw", "se", "sw")
+
+
+def _slides_along(piece, dir):
+    "Whether the piece attacks any distance along the line with the given direction"
+    if type(piece) is Queen:
+        return True
+    if type(piece) is Rook:
+        return dir not in DIAGONALS
+    if type(piece) is Bishop:
+        return dir in DIAGONALS
+    return False
+
+
+def is_attacked(board, space, side, empty=None):
+    """Whether any piece of side attacks the given space
+
+    Args:
+        board (Board): board holding the pieces
+        space (Space): space that may be attacked, which may hold a piece of either side or none
+        side (bool): attacking side
+        empty (Space, optional): space to treat as empty, such as that of a king looking for a safe square,
+            so that sliding attacks through it are seen. Defaults to None.
+    """
+    return next(iter_attackers(board, space, side, empty), None) is not None
+
+
+def iter_attackers(board, space, side, empty=None):
+    """Yields (attacker space, spaces between the attacker and space) for every piece of side attacking space,
+    where the spaces in between are ordered from space outwards and include the attacker's own space
+    """
+    for dir, ray in board.rays(space).items():
+        for distance, target in enumerate(ray):
+            piece = target.piece
+            if piece is None or target is empty:
+                continue
+            if piece.side == side:
+                if _slides_along(piece, dir) or (distance == 0 and type(piece) is King):
+                    yield target, ray[:distance + 1]
+                elif distance == 0 and type(piece) is Pawn and dir in PAWN_ATTACK_LOOKUPS[side]:
+                    yield target, ray[:1]
+            break
+    for target in board.knight_targets(space):
+        piece = target.piece
+        if piece is not None and piece.side == side and type(piece) is Knight:
+            yield target, (target,)
+
+
+def find_pins(board, king_space, side):
+    """Finds the pieces of side that cannot leave the line between their king and an enemy slider
+
+    Returns:
+        dict: pinned piece's space -> set of spaces it may still move to, which are the spaces between
+            the king and the pinning piece including the pinning piece's space
+    """
+    pins = {}
+    for dir, ray in board.rays(king_space).items():
+        own = None
+        for distance, target in enumerate(ray):
+            piece = target.piece
+            if piece is None:
+                continue
+            if piece.side == side:
+                if own is not None:
+                    break
+                own = target
+            else:
+                if own is not None and _slides_along(piece, dir):
+                    pins[own] = set(ray[:distance + 1])
+                break
+    return pins
@@ -0,0 +1,125 @@
+"""
+FEN (Forsyth-Edwards Notation) import and export for chess game states
+
+The first rank in a FEN string is black's back rank, which is row 0 of the board, so ranks map
+straight onto rows. This chess has no castling or en passant, so those fields are ignored when
+reading and written as "-". The halfmove clock is the game state's draw counter, and the fullmove
+number is worked out from its turn counter, which counts plies.
+"""
+from constants import BLACK, BOARD_SIZE, WHITE
+from board import Board
+from chess.pieces import ChessFactory, Bishop, King, Knight, Pawn, Queen, Rook
+from chess.game_state import ChessGameState
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1"
+
+# FEN letter -> (piece class, side), and the reverse
+PIECE_LETTERS = {
+    "P": (Pawn, WHITE), "N": (Knight, WHITE), "B": (Bishop, WHITE),
+    "R": (Rook, WHITE), "Q": (Queen, WHITE), "K": (King, WHITE),
+    "p": (Pawn, BLACK), "n": (Knight, BLACK), "b": (Bishop, BLACK),
+    "r": (Rook, BLACK), "q": (Queen, BLACK), "k": (King, BLACK),
+}
+LETTERS = {piece: letter for letter, piece in PIECE_LETTERS.items()}
+SIDES = {"w": WHITE, "b": BLACK}
+
+
+def load_fen(game_state, fen):
+    """Replaces the position of an existing chess game state with the one in a FEN string
+
+    The board's spaces and lookups are reused and only the pieces are created,
+    which makes this much faster than building a new game state.
+
+    Raises:
+        ValueError: if the string is not a FEN for the game state's board size
+    """
+    fields = fen.split()
+    if len(fields) < 2:
+        raise ValueError(f"invalid FEN {fen!r}: expected at least the placement and side to move")
+    rows = fields[0].split("/")
+    board = game_state.board
+    size = board.size
+    if len(rows) != size:
+        raise ValueError(f"invalid FEN {fen!r}: expected {size} ranks")
+    side = SIDES.get(fields[1])
+    if side is None:
+        raise ValueError(f"invalid FEN {fen!r}: side to move must be w or b")
+    try:
+        halfmove = int(fields[4]) if len(fields) > 4 else 0
+        fullmove = int(fields[5]) if len(fields) > 5 else 1
+    except ValueError:
+        raise ValueError(f"invalid FEN {fen!r}: move counters must be numbers") from None
+
+    placements = []
+    for row, text in enumerate(rows):
+        col = 0
+        for char in text:
+            if char.isdigit():
+                col += int(char)
+                continue
+            piece = PIECE_LETTERS.get(char)
+            if piece is None:
+                raise ValueError(f"invalid FEN {fen!r}: unknown piece {char!r}")
+            if col < size:
+                placements.append((row * size + col, piece))
+            col += 1
+        if col != size:
+            raise ValueError(f"invalid FEN {fen!r}: rank {row + 1} does not have {size} squares")
+
+    board.clear()
+    for square, (piece_class, piece_side) in placements:
+        space = board.space_at(square)
+        space.piece = piece_class(piece_side, board, space)
+    board.pieces_placed()
+
+    game_state._current_side = side
+    game_state._turn_counter = 2 * fullmove - (1 if side == WHITE else 0)
+    game_state.draw_counter = halfmove
+    game_state._position_cache.clear()
+
+
+def from_fen(fen, board_class=Board):
+    "Returns a new chess game state in the position given by a FEN string"
+    game_state = ChessGameState(board_class(int(BOARD_SIZE), ChessFactory()), WHITE, None)
+    load_fen(game_state, fen)
+    return game_state
+
+
+def to_fen(game_state):
+    "FEN string for the position of a chess game state"
+    board = game_state.board
+    size = board.size
+    rows = []
+    for row in range(size):
+        text = ""
+        empty = 0
+        for col in range(size):
+            piece = board.space_at(row * size + col).piece
+            if piece is None:
+                empty += 1
+                continue
+            if empty:
+                text += str(empty)
+                empty = 0
+            text += LETTERS[(type(piece), piece.side)]
+        if empty:
+            text += str(empty)
+        rows.append(text)
+    side = "w" if game_state.current_side == WHITE else "b"
+    fullmove = (game_state._turn_counter + 1) // 2
+    return f"{'/'.join(rows)} {side} - - {game_state.draw_counter} {fullmove}"
+
+
+def read_fens(lines, board_class=Board):
+    """Yields a game state for each FEN in an iterable of lines, such as an open file, skipping blank lines
+
+    To avoid building a board per line, the same game state is loaded with each position in turn,
+    so it is only valid until the next one is read. Copy it to keep a position.
+    """
+    game_state = ChessGameState(board_class(int(BOARD_SIZE), ChessFactory()), WHITE, None)
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        load_fen(game_state, line)
+        yield game_state
@@ -1,29 +1,85 @@
 from game_state import GameState
 from chess.moves import ChessMoveSet
+from chess.attacks import find_pins, is_attacked, iter_attackers
 from constants import BLACK, WHITE
 
 
 class ChessGameState(GameState):
-    def all_possible_moves(self, side=None):
-        if not side:
+    """
+    Chess game state with legal move generation: moves that would leave the mover's king
+    attacked are never generated, and a side with no moves is checkmated if it is in check
+    and stalemated otherwise.
+    """
+    move_set = ChessMoveSet
+
+    def checks(self, side=None):
+        """Pieces giving check to a side's king
+
+        Returns:
+            list: (checking piece's space, spaces that capture or block the check) for each checking piece,
+                empty if the side is not in check or has no king
+        """
+        if side is None:
             side = self._current_side
-        pieces = self._board.pieces_iterator(side)
-        # uses CheckersMoveSet to enforce restriction on basic moves when at least once piece has a jump
-        options = ChessMoveSet()
-        for piece in pieces:
-            options.extend(piece.enumerate_moves())
+        checks = self._position_cache.get(("checks", side))
+        if checks is None:
+            king_space = self._board.king_space(side)
+            checks = []
+            if king_space:
+                checks = [(space, set(between)) for space, between in iter_attackers(self._board, king_space, not side)]
+            self._position_cache[("checks", side)] = checks
+        return checks
+
+    def in_check(self, side=None):
+        return len(self.checks(side)) > 0
 
-        return options
+    def is_attacked(self, space, side, empty=None):
+        return is_attacked(self._board, space, side, empty)
 
+    def piece_moves(self, side, captures_only=False, piece_class=None, quiet_only=False):
+        """Yields the legal moves of each of a side's pieces in turn
 
+        When in check only king moves, captures of the checking piece and blocks are left,
+        and pinned pieces keep only the moves along the line of their pin.
+        """
+        board = self._board
+        king_space = board.king_space(side)
+        if king_space is None:
+            # the king was captured, which only happens in positions set up by hand
+            yield from super().piece_moves(side, captures_only, piece_class, quiet_only)
+            return
+        checks = self.checks(side)
+        pins = find_pins(board, king_space, side) if len(checks) < 2 else {}
+        evasions = checks[0][1] if len(checks) == 1 else None
+        for piece in board.pieces_iterator(side):
+            if piece_class is not None and type(piece) is not piece_class:
+                continue
+            space = piece._current_space
+            if space is king_space:
+                yield [m for m in piece.enumerate_moves(captures_only, quiet_only) if not is_attacked(board, m._end, not side, king_space)]
+            elif len(checks) > 1:
+                # only the king can answer a double check
+                continue
+            else:
+                moves = piece.enumerate_moves(captures_only, quiet_only)
+                if space in pins:
+                    moves = [m for m in moves if m._end in pins[space]]
+                if evasions is not None:
+                    moves = [m for m in moves if m._end in evasions]
+                yield moves
 
     def check_loss(self, side=None):
-        #Do some sort of logic to check if player cant escape check
-        if not side:
+        if side is None:
+            side = self._current_side
+        # checkmate, or the king has been captured in a position set up by hand
+        if self._board.king_space(side) is None:
+            return True
+        return self.in_check(side) and not self.has_any_legal_move(side)
+
+    def check_draw(self, side=None):
+        if side is None:
             side = self._current_side
-        # no more pieces
-        # pieces = list()
-        for piece in self._board.pieces_iterator(side):
-            if piece._val == 100:
-                return False
-        return True
+        # a side with no moves is only stalemated if it is not in check
+        if self.in_check(side) and not self.has_any_legal_move(side):
+            return False
+        return super().check_draw(side)
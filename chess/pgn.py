@@ -0,0 +1,193 @@
+"""
+PGN (Portable Game Notation) games for chess, with moves in SAN (Standard Algebraic Notation)
+
+Squares are named as in standard chess, with rank 1 being white's back rank, which is the last
+row of the board. This is the other way round from the labels the board prints, which count rows
+from the top. This chess has no castling or en passant and pawns always promote to queens, so
+games using those moves are read but cannot be replayed.
+"""
+import re
+from copy import deepcopy
+from string import ascii_lowercase
+
+from constants import WHITE
+from board import Board
+from notation import GameRecord, read_records, write_record
+from chess.pieces import Bishop, King, Knight, Pawn, Queen, Rook
+from chess.fen import START_FEN, from_fen, load_fen, to_fen
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+# tags every PGN game has, in the order they are written
+ROSTER = ("Event", "Site", "Date", "Round", "White", "Black", "Result")
+
+# SAN letter -> piece class, and the reverse with pawns having no letter
+PIECE_LETTERS = {"N": Knight, "B": Bishop, "R": Rook, "Q": Queen, "K": King}
+LETTERS = {piece_class: letter for letter, piece_class in PIECE_LETTERS.items()}
+
+_SAN = re.compile(r"([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?[+#]?[!?]*$")
+_CASTLING = re.compile(r"[O0]-[O0](-[O0])?[+#]?[!?]*$")
+
+
+def square_name(board, space):
+    "Standard name of a space such as e4"
+    return ascii_lowercase[space.col] + str(board.size - space.row)
+
+
+def space_named(board, name):
+    """Space of the board with a standard name such as e4
+
+    Raises:
+        ValueError: if the name is not a square of the board
+    """
+    col = ascii_lowercase.find(name[0])
+    row = board.size - int(name[1:]) if name[1:].isdigit() else -1
+    if not (0 <= col < board.size and 0 <= row < board.size):
+        raise ValueError(f"{name} is not a square of the board")
+    return board.space_at(row * board.size + col)
+
+
+def _san(game_state, move):
+    "SAN of a legal move of the current position without its check or checkmate suffix"
+    board = game_state.board
+    piece = move._start.piece
+    end = square_name(board, move._end)
+    if type(piece) is Pawn:
+        text = square_name(board, move._start)[0] + "x" + end if move._captures else end
+        return text + "=Q" if move._promotion else text
+
+    # only name the start file, rank or both when another piece of the same type can move to the same square
+    others = [m._start for m in _piece_class_moves(game_state, type(piece))
+              if m._end is move._end and m._start is not move._start]
+    start = ""
+    if others:
+        name = square_name(board, move._start)
+        if all(space.col != move._start.col for space in others):
+            start = name[0]
+        elif all(space.row != move._start.row for space in others):
+            start = name[1:]
+        else:
+            start = name
+    return LETTERS[type(piece)] + start + ("x" if move._captures else "") + end
+
+
+def _piece_class_moves(game_state, piece_class):
+    "Legal moves of the current side's pieces of one class, which is all that is needed to resolve SAN"
+    for moves in game_state.piece_moves(game_state.current_side, piece_class=piece_class):
+        yield from moves
+
+
+def _suffix(game_state):
+    "Check or checkmate suffix for the move that has just been executed"
+    if not game_state.in_check():
+        return ""
+    return "+" if game_state.has_any_legal_move() else "#"
+
+
+def san(game_state, move):
+    "SAN of a legal move of the current position, which is executed and undone to find whether it checks"
+    text = _san(game_state, move)
+    move.execute(game_state)
+    text += _suffix(game_state)
+    move.undo(game_state)
+    return text
+
+
+def find_san(game_state, text):
+    """Finds the current side's legal move for its SAN
+
+    Raises:
+        ValueError: if the text is not SAN, is a move this chess does not have, or does not match exactly one legal move
+    """
+    match = _SAN.match(text)
+    if not match:
+        if _CASTLING.match(text):
+            raise ValueError(f"{text}: castling is not part of this chess")
+        raise ValueError(f"{text!r} is not SAN")
+    letter, file, rank, end, promotion = match.groups()
+    if promotion and promotion != "Q":
+        raise ValueError(f"{text}: pawns can only promote to queens")
+    board = game_state.board
+    end = space_named(board, end)
+    piece_class = PIECE_LETTERS[letter] if letter else Pawn
+    col = ascii_lowercase.find(file) if file else None
+    row = board.size - int(rank) if rank else None
+    matches = [m for m in _piece_class_moves(game_state, piece_class)
+               if m._end is end and (col is None or m._start.col == col) and (row is None or m._start.row == row)]
+    if len(matches) != 1:
+        raise ValueError(f"{text} matches {len(matches)} moves")
+    return matches[0]
+
+
+class PGNGame(GameRecord):
+    """
+    A chess game read from PGN: its tags, the SAN of its moves and its result
+    """
+    start_fen = START_FEN
+    from_fen = staticmethod(from_fen)
+    load_fen = staticmethod(load_fen)
+
+    def replay(self, board_class=Board, game_state=None):
+        """Plays the game on a single game state, yielding each ChessMove as it is executed with the game state after it
+
+        Args are as for GameRecord.start.
+
+        Raises:
+            ValueError: if a move is not legal
+        """
+        game_state = self.start(board_class, game_state)
+        for text in self.moves:
+            move = find_san(game_state, text)
+            move.execute(game_state)
+            yield move, game_state
+
+
+def read_games(lines):
+    """Yields a PGNGame for each game in an iterable of lines, such as an open file
+
+    Only the current game is held in memory and moves are kept as text until the game is replayed,
+    so reading is much faster than replaying. Comments, variations and annotations are skipped.
+    """
+    return read_records(lines, RESULTS, PGNGame)
+
+
+def write_game(file, start, moves, tags=None, result="*"):
+    """Writes a game in PGN
+
+    Args:
+        file: text file to write to
+        start (ChessGameState): game state in the starting position, which is not changed
+        moves (list): Move objects of the game in order, which are matched by their squares
+            on a copy of the start so they may come from any board
+        tags (dict, optional): tag name -> value, with tags missing from the seven tag roster written as unknown.
+            Defaults to None.
+        result (str, optional): PGN result such as "1-0". Defaults to "*".
+
+    Raises:
+        ValueError: if a move is not legal
+    """
+    tags = dict(tags or {})
+    tags["Result"] = result
+    roster = {name: tags.pop(name, "????.??.??" if name == "Date" else "?") for name in ROSTER}
+    roster.update(tags)
+    fen = to_fen(start)
+    if fen != START_FEN:
+        roster["SetUp"] = "1"
+        roster["FEN"] = fen
+
+    game_state = deepcopy(start)
+    board = game_state.board
+    tokens = []
+    for move in moves:
+        number = (game_state._turn_counter + 1) // 2
+        if game_state.current_side == WHITE:
+            tokens.append(f"{number}.")
+        elif not tokens:
+            tokens.append(f"{number}...")
+        replayed = game_state.find_move(board.space_at(board.square(move._start)), board.space_at(board.square(move._end)))
+        if replayed is None:
+            raise ValueError(f"{move} is not a legal move in this position")
+        text = _san(game_state, replayed)
+        replayed.execute(game_state)
+        tokens.append(text + _suffix(game_state))
+    tokens.append(result)
+    write_record(file, roster, tokens)
@@ -2,11 +2,15 @@ from piece import Piece
 from piece_factory import PieceFactory
 from constants import BLACK, WHITE
 from chess.moves import ChessMove, ChessMoveSet
+from chess.evaluation import CHESS_TABLES
+from bitboard import iterate_bits
 
 
 class ChessFactory(PieceFactory):
     "Concrete piece factory for setting up a chess game"
 
+    piece_square_tables = CHESS_TABLES
+
     def create_piece(self, board, space):
         x = space.row
         y = space.col
@@ -38,117 +42,142 @@ class ChessFactory(PieceFactory):
         
         return None
 
+
+def _bitboard_moves(piece, targets, promotion_row=None):
+    """Builds ChessMoves from a mask of target squares, treating targets occupied by the opponent as captures
+
+    Args:
+        piece (Piece): piece being moved
+        targets (int): bitmask of destination squares on the piece's BitBoard
+        promotion_row (int, optional): row on which moves are marked as promotions. Defaults to None.
+    """
+    board = piece._board
+    start = piece._current_space
+    enemy = board.side_mask(not piece.side)
+    moves = ChessMoveSet()
+    for square in iterate_bits(targets):
+        end = board.space_at(square)
+        if enemy >> square & 1:
+            m = ChessMove(start, end, [end])
+        else:
+            m = ChessMove(start, end)
+        if end.row == promotion_row:
+            m.add_promotion()
+        moves.append(m)
+    return moves
+
+
+def _target_mask(piece, captures_only, quiet_only):
+    """Mask of the squares a piece's BitBoard moves may end on, only the opponent's pieces when generating captures
+    and only empty squares when generating quiet moves"""
+    board = piece._board
+    if captures_only:
+        return board.side_mask(not piece.side)
+    if quiet_only:
+        return board.empty_mask()
+    return ~board.side_mask(piece.side)
+
+
 class ChessPiece(Piece):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if self._side == WHITE:
-            self._symbol = u"⚆"
-            self._directions = []
-        if self._side == BLACK:
-            self._symbol = u"⚈"
-            self._directions = []
-    def enumerate_moves(self):
+    __slots__ = ()
+    _symbols = {WHITE: u"⚆", BLACK: u"⚈"}
+    _directions = ()
+    def enumerate_moves(self, captures_only=False, quiet_only=False):
+        if self._board.bitboards:
+            board = self._board
+            start = board.bit(self._current_space)
+            empty = board.empty_mask()
+            targets = 0
+            for direction in self._directions:
+                targets |= board.slide(start, direction, empty)
+            return _bitboard_moves(self, targets & _target_mask(self, captures_only, quiet_only))
+
         moves = ChessMoveSet()
-        done_jumping = True
+        rays = self._board.rays(self._current_space)
         for direction in self._directions:
-            one_step = self._board.get_dir(self._current_space, direction)
-            while one_step and one_step.is_free():
-                m = ChessMove(self._current_space, one_step, [])
-                moves.append(m)
-                one_step = self._board.get_dir(one_step, direction)
-            if one_step and not one_step.is_free():
-                if one_step.piece.side != self._side:
+            for one_step in rays[direction]:
+                if one_step.is_free():
+                    if not captures_only:
+                        m = ChessMove(self._current_space, one_step)
+                        moves.append(m)
+                    continue
+                if one_step.piece.side != self._side and not quiet_only:
                     m = ChessMove(self._current_space, one_step, [one_step])
                     moves.append(m)
-                    continue
-                else:
-                    continue
+                break
         return moves
 
 class Bishop(ChessPiece):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._val = 3
-        self._directions = ["ne", "nw", "se", "sw"]
-        if self._side == WHITE:
-            self._symbol = u"♗"    
-        if self._side == BLACK:
-            self._symbol = u"♝"
+    __slots__ = ()
+    _val = 3
+    _directions = ("ne", "nw", "se", "sw")
+    _symbols = {WHITE: u"♗", BLACK: u"♝"}
 
 
 class Rook(ChessPiece):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._val = 5
-        self._directions = ["n", "s", "e", "w"]
-        if self._side == WHITE:
-            self._symbol = u"♖"    
-        if self._side == BLACK:
-            self._symbol = u"♜"
+    __slots__ = ()
+    _val = 5
+    _directions = ("n", "s", "e", "w")
+    _symbols = {WHITE: u"♖", BLACK: u"♜"}
 
 class Queen(ChessPiece):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._val = 9
-        self._directions = ["n", "s", "e", "w", "ne", "nw", "se", "sw"]
-        if self._side == WHITE:
-            self._symbol = u"♕"    
-        if self._side == BLACK:
-            self._symbol = u"♛"
+    __slots__ = ()
+    _val = 9
+    _directions = ("n", "s", "e", "w", "ne", "nw", "se", "sw")
+    _symbols = {WHITE: u"♕", BLACK: u"♛"}
 
 class Knight(Piece):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._val = 3
-        if self._side == WHITE:
-            self._symbol = u"♘"    
-        if self._side == BLACK:
-            self._symbol = u"♞"
-    def enumerate_moves(self):
+    __slots__ = ()
+    _val = 3
+    _symbols = {WHITE: u"♘", BLACK: u"♞"}
+    def enumerate_moves(self, captures_only=False, quiet_only=False):
         moves = ChessMoveSet()
         dir1 = ["n", "e", "s", "w"]
         dir2 = ["e", "s", "w", "n"]
         dir3 = ["w", "n", "e", "s"]
 
-        for i, direction in enumerate(dir1):
-            one_step = self._board.get_dir(self._current_space, direction)
-            if not one_step:
-                continue
-            two_step = self._board.get_dir(one_step, direction)
-            if not two_step:
-                continue
-            turn1 = self._board.get_dir(two_step, dir2[i])
-            turn2 = self._board.get_dir(two_step, dir3[i])
-            for turn in [turn1, turn2]:
-                if turn and not turn.is_free():
-                    if turn.piece.side != self._side:
-                        m = ChessMove(self._current_space, turn, [turn])
-                        moves.append(m)
-                    else:
-                        continue
-                elif turn and turn.is_free():
+        if self._board.bitboards:
+            board = self._board
+            start = board.bit(self._current_space)
+            targets = 0
+            for i, direction in enumerate(dir1):
+                two_step = board.shift(board.shift(start, direction), direction)
+                targets |= board.shift(two_step, dir2[i]) | board.shift(two_step, dir3[i])
+            return _bitboard_moves(self, targets & _target_mask(self, captures_only, quiet_only))
+
+        for turn in self._board.knight_targets(self._current_space):
+            if turn.is_free():
+                if not captures_only:
                     m = ChessMove(self._current_space, turn)
                     moves.append(m)
-        
+            elif turn.piece.side != self._side and not quiet_only:
+                m = ChessMove(self._current_space, turn, [turn])
+                moves.append(m)
+
         return moves
 
 class King(Piece):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._directions = ["n", "s", "e", "w", "ne", "nw", "se", "sw"]
-        self._val = 100
-        if self._side == WHITE:
-            self._symbol = u"♔"    
-        if self._side == BLACK:
-            self._symbol = u"♚"
-    def enumerate_moves(self):
+    __slots__ = ()
+    royal = True
+    _val = 100
+    _directions = ("n", "s", "e", "w", "ne", "nw", "se", "sw")
+    _symbols = {WHITE: u"♔", BLACK: u"♚"}
+    def enumerate_moves(self, captures_only=False, quiet_only=False):
+        if self._board.bitboards:
+            board = self._board
+            start = board.bit(self._current_space)
+            targets = 0
+            for direction in self._directions:
+                targets |= board.shift(start, direction)
+            return _bitboard_moves(self, targets & _target_mask(self, captures_only, quiet_only))
+
         moves = ChessMoveSet()
-        for direction in self._directions:
-            one_step = self._board.get_dir(self._current_space, direction)
-            if one_step and one_step.is_free():
-                m = ChessMove(self._current_space, one_step)
-                moves.append(m)
-            elif one_step and not one_step.is_free() and one_step.piece.side != self._side:
+        for one_step in self._board.king_targets(self._current_space):
+            if one_step.is_free():
+                if not captures_only:
+                    m = ChessMove(self._current_space, one_step)
+                    moves.append(m)
+            elif one_step.piece.side != self._side and not quiet_only:
                 m = ChessMove(self._current_space, one_step, [one_step])
                 moves.append(m)
         return moves
@@ -156,34 +185,53 @@ class King(Piece):
 
 
 class Pawn(Piece):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._val = 1
-        self._cap_directions = ["ne", "nw"]
-        if self._side == WHITE:
-            self._symbol = u"♙"
-            self._directions = ["n"]
-        if self._side == BLACK:
-            self._symbol = u"♟︎"
-            self._directions = ["s"]
-            self._cap_directions = ["se", "sw"]
-
-    def enumerate_moves(self):
+    __slots__ = ()
+    _val = 1
+    _symbols = {WHITE: u"♙", BLACK: u"♟︎"}
+    # side -> direction of a pawn's basic moves and directions of its captures
+    _side_directions = {WHITE: ("n",), BLACK: ("s",)}
+    _side_cap_directions = {WHITE: ("ne", "nw"), BLACK: ("se", "sw")}
+
+    @property
+    def _directions(self):
+        return self._side_directions[self._side]
+
+    @property
+    def _cap_directions(self):
+        return self._side_cap_directions[self._side]
+
+    def enumerate_moves(self, captures_only=False, quiet_only=False):
+        on_start_row = (self._side == WHITE and self._current_space.row == self._board.size - 2) or \
+            (self._side == BLACK and self._current_space.row == 1)
+
+        if self._board.bitboards:
+            board = self._board
+            start = board.bit(self._current_space)
+            empty = board.empty_mask()
+            targets = 0
+            if not captures_only:
+                targets = board.shift(start, self._directions[0]) & empty
+                if on_start_row:
+                    targets |= board.shift(targets, self._directions[0]) & empty
+            if not quiet_only:
+                for direction in self._cap_directions:
+                    targets |= board.shift(start, direction) & board.side_mask(not self._side)
+            promotion_row = 0 if self._side == WHITE else board.size - 1
+            return _bitboard_moves(self, targets, promotion_row)
+
         moves = ChessMoveSet()
+        rays = self._board.rays(self._current_space)
 
-        if (self._side == WHITE and self._current_space.row == self._board.size - 2) or \
-                (self._side == BLACK and self._current_space.row == 1):
-            direction = self._directions[0]
-            step = self._board.get_dir(self._current_space, direction)
-            if step and step.is_free():
-                step = self._board.get_dir(step, direction)
-            if step and step.is_free():
-                m = ChessMove(self._current_space, step)
+        if on_start_row and not captures_only:
+            ray = rays[self._directions[0]]
+            if len(ray) > 1 and ray[0].is_free() and ray[1].is_free():
+                m = ChessMove(self._current_space, ray[1])
                 moves.append(m)
         # basic moves
         for direction in self._directions:
-            one_step = self._board.get_dir(self._current_space, direction)
-            if one_step and one_step.is_free():
+            ray = rays[direction]
+            one_step = ray[0] if ray else None
+            if one_step and one_step.is_free() and not captures_only:
                 m = ChessMove(self._current_space, one_step)
                 moves.append(m)
                 if (self._side == WHITE and one_step.row == 0) or \
@@ -191,8 +239,9 @@ class Pawn(Piece):
                     m.add_promotion()
         
         for direction in self._cap_directions:
-            one_step = self._board.get_dir(self._current_space, direction)
-            if one_step and not one_step.is_free() and one_step.piece.side != self._side:
+            ray = rays[direction]
+            one_step = ray[0] if ray else None
+            if one_step and not one_step.is_free() and one_step.piece.side != self._side and not quiet_only:
                 m = ChessMove(self._current_space, one_step, [one_step])
                 moves.append(m)
                 if (self._side == WHITE and one_step.row == 0) or \
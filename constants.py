@@ -8,5 +8,15 @@ ALPHABET = "abcdefghijklmnopqrstuvwxyz"
 
 BOARD_SIZE = 8
 
-WIN = 1600
-LOSS = -1600
+# beyond any evaluation, which is in hundredths of a piece's value
+WIN = 1000000
+LOSS = -1000000
+
+# default memory budget for each MiniMax player's transposition table
+TT_SIZE_MB = 16
+
+# deepest search used when a MiniMax player is limited by time or nodes instead of depth
+MAX_DEPTH = 64
+
+# most plies of captures searched past the nominal depth before a leaf is evaluated as it stands
+QUIESCENCE_DEPTH = 4
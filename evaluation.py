@@ -0,0 +1,65 @@
+"""
+Units and piece-square tables for the evaluation the board keeps up to date incrementally
+
+Scores are in hundredths of a material point (a chess pawn or a checker is 100) so piece-square
+bonuses can be finer than a whole piece. Each side's score is the value of its pieces plus the
+piece-square bonus of every piece on its square, and Board adjusts it on every piece placed or
+removed so GameState.evaluate never has to look at the board.
+"""
+from constants import BLACK, WHITE
+
+# evaluation units per point of Piece._val
+MATERIAL_SCALE = 100
+
+
+class PieceSquareTables:
+    """
+    Bonus for a piece type standing on a square.
+
+    Tables are written from white's point of view as the board is printed: the first row is
+    row 0, the far side that white pawns and checkers move towards. Black uses the same tables
+    mirrored top to bottom. Piece types without a table get no bonus.
+    """
+
+    def __init__(self, tables):
+        """
+        Args:
+            tables (dict): piece class name, such as "Knight" or "KingChecker" -> list of rows, each a list of
+                bonuses in evaluation units, with as many rows and columns as the board
+        """
+        self._tables = {}
+        self._size = None
+        for name, rows in tables.items():
+            size = len(rows)
+            if self._size is None:
+                self._size = size
+            elif size != self._size or any(len(row) != size for row in rows):
+                raise ValueError(f"table for {name} is not {self._size}x{self._size}")
+            white = [bonus for row in rows for bonus in row]
+            black = [bonus for row in reversed(rows) for bonus in row]
+            self._tables[(name, WHITE)] = white
+            self._tables[(name, BLACK)] = black
+
+    @property
+    def size(self):
+        "Number of rows and columns the tables were written for, or None if there are no tables"
+        return self._size
+
+    def value(self, piece, space):
+        "Bonus for the given piece standing on the given space"
+        table = self._tables.get((type(piece).__name__, piece.side))
+        if table is None:
+            return 0
+        return table[space.row * self._size + space.col]
+
+
+def piece_score(piece, space, tables):
+    """Contribution of one piece to its side's score
+
+    Args:
+        tables (PieceSquareTables): tables to take the bonus from, or None for material only
+    """
+    score = piece._val * MATERIAL_SCALE
+    if tables:
+        score += tables.value(piece, space)
+    return score
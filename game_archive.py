@@ -0,0 +1,293 @@
+"""
+Compact binary archives of games with an index for random access
+
+An archive file holds games one after another, each a small header followed by two bytes per ply,
+and the index file next to it holds the offset of every game. Both are read through mmap, so
+any ply of any game can be reached without reading the games before it, and archives much larger
+than memory can be read.
+
+Archive: b"GARC", version byte, three padding bytes, then for each game
+    game (u8), result (u8), FEN length (u16), plies (u32), FEN (ascii), moves (u16 per ply)
+Index: b"GIDX", version byte, three padding bytes, then the offset of each game (u64)
+
+All numbers are little endian. The FEN is empty for games from the usual starting position.
+A move is the encode_move code of its start and end squares, plus a variant number times the
+square count squared to pick out one of several jumps of a checker between the same squares,
+numbered in order of the squares they capture.
+"""
+import mmap
+import struct
+from copy import deepcopy
+
+from constants import CHECKERS, CHESS
+from board import Board
+from notation import GameRecord
+from transposition import encode_move
+from chess import fen as chess_fen
+from checkers import pdn
+from checkers.game_state import CheckersGameState
+
+ARCHIVE_MAGIC = b"GARC"
+INDEX_MAGIC = b"GIDX"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sB3x")
+GAME_HEADER = struct.Struct("<BBHI")
+OFFSET = struct.Struct("<Q")
+MOVE = struct.Struct("<H")
+
+GAMES = (CHESS, CHECKERS)
+RESULTS = ("*", "1-0", "0-1", "1/2-1/2")
+# position of new game states, which is the same as the usual start except that white moves first in checkers
+START_FENS = {CHESS: chess_fen.START_FEN, CHECKERS: "W" + pdn.START_FEN[1:]}
+
+
+def index_path(path):
+    "Path of the index file for an archive"
+    return path + ".idx"
+
+
+def _variant_squares(board, move):
+    return tuple(board.square(cap) for cap in move._captures)
+
+
+def _check_size(board):
+    squares = board.size * board.size
+    if squares * squares * 16 > 1 << 16:
+        raise ValueError("moves only fit in two bytes on boards of up to 8x8")
+
+
+def decode_move(game_state, code):
+    """Finds the move of the current position that an archive packed into code
+
+    Only the moves of the piece on the start square are generated, so the move must be known to be legal,
+    such as a move stored for the same position.
+
+    Returns:
+        Move: the move, or None if the position has no such move
+    """
+    board = game_state.board
+    squares = board.size * board.size
+    variant, code = divmod(code, squares * squares)
+    start, end = divmod(code, squares)
+    piece = board.space_at(start).piece
+    if piece is None or piece.side != game_state.current_side:
+        return None
+    end = board.space_at(end)
+    moves = [m for m in piece.enumerate_moves() if m._end is end]
+    if len(moves) > 1:
+        moves.sort(key=lambda m: _variant_squares(board, m))
+    return moves[variant] if variant < len(moves) else None
+
+
+class ArchiveWriter:
+    """
+    Writes games to an archive and its index as they are added, so nothing is held in memory between games
+    """
+
+    def __init__(self, path, append=False):
+        """
+        Args:
+            path (str): archive file, with the index written to index_path(path)
+            append (bool, optional): add to the games of an existing archive instead of replacing it. Defaults to False.
+        """
+        mode = "ab" if append else "wb"
+        self._archive = open(path, mode)
+        self._index = open(index_path(path), mode)
+        if self._archive.tell() == 0:
+            self._archive.write(FILE_HEADER.pack(ARCHIVE_MAGIC, VERSION))
+            self._index.write(FILE_HEADER.pack(INDEX_MAGIC, VERSION))
+        # games written by this writer
+        self.games = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._archive.close()
+        self._index.close()
+
+    def write_game(self, start, moves, result="*"):
+        """Adds a game to the archive
+
+        Args:
+            start (GameState): chess or checkers game state in the starting position, which is not changed
+            moves (list): Move objects of the game in order, which are matched by their squares on a copy
+                of the start so they may come from any board
+            result (str, optional): one of RESULTS. Defaults to "*".
+
+        Raises:
+            ValueError: if a move is not legal or is one of too many jumps between the same squares to pack,
+                which is found before any of the game is written
+        """
+        game = CHECKERS if isinstance(start, CheckersGameState) else CHESS
+        _check_size(start.board)
+        fen = pdn.to_fen(start) if game == CHECKERS else chess_fen.to_fen(start)
+        if fen == START_FENS[game]:
+            fen = ""
+
+        game_state = deepcopy(start)
+        board = game_state.board
+        squares = board.size * board.size
+        codes = bytearray()
+        for move in moves:
+            start_space = board.space_at(board.square(move._start))
+            end = board.square(move._end)
+            piece = start_space.piece
+            candidates = [m for m in piece.enumerate_moves() if board.square(m._end) == end] \
+                if piece is not None and piece.side == game_state.current_side else []
+            # several candidates are jumps between the same squares that capture different pieces
+            variants = sorted(_variant_squares(board, m) for m in candidates)
+            captures = _variant_squares(board, move)
+            if captures not in variants:
+                raise ValueError(f"{move} is not a legal move in this position")
+            variant = variants.index(captures)
+            replayed = next(m for m in candidates if _variant_squares(board, m) == captures)
+            code = variant * squares * squares + encode_move(board, replayed)
+            if code >= 1 << 16:
+                raise ValueError(f"{move} is one of more jumps between the same squares than a move code can tell apart")
+            codes += MOVE.pack(code)
+            replayed.execute(game_state)
+
+        fen = fen.encode("ascii")
+        offset = self._archive.tell()
+        self._archive.write(GAME_HEADER.pack(GAMES.index(game), RESULTS.index(result), len(fen), len(moves)))
+        self._archive.write(fen)
+        self._archive.write(codes)
+        self._index.write(OFFSET.pack(offset))
+        self.games += 1
+
+
+class ArchivedGame(GameRecord):
+    """
+    A game of an archive, with the packed code of each move as its moves, which are only decoded when it is replayed
+    """
+    # CHESS or CHECKERS, set by the subclass for each game
+    game = None
+
+    def __init__(self, result, fen, codes):
+        """
+        Args:
+            result (str): one of RESULTS
+            fen (str): starting position, or an empty string for the usual start
+            codes (bytes): the packed moves
+        """
+        super().__init__({"FEN": fen} if fen else {}, [code for (code,) in MOVE.iter_unpack(codes)], result)
+
+    @property
+    def plies(self):
+        return len(self.moves)
+
+    @property
+    def codes(self):
+        "A new list of the packed code of each move, as decoded by decode_move"
+        return list(self.moves)
+
+    def replay(self, board_class=Board, game_state=None, plies=None):
+        """Plays the game on a single game state with Move.execute, yielding each move as it is executed
+        with the game state after it
+
+        Args are as for GameRecord.start, and plies stops the replay after that many moves. Defaults to None for the whole game.
+        """
+        game_state = self.start(board_class, game_state)
+        count = self.plies if plies is None else min(plies, self.plies)
+        yield from self._play(game_state, count)
+
+    def state_at(self, ply, board_class=Board):
+        """Builds a new game state in the position after the given number of moves
+
+        Raises:
+            IndexError: if the game does not have that many moves
+        """
+        if not 0 <= ply <= self.plies:
+            raise IndexError(f"ply {ply} is not in the game")
+        game_state = self.start(board_class)
+        for _ in self._play(game_state, ply):
+            pass
+        return game_state
+
+    def _play(self, game_state, count):
+        for code in self.moves[:count]:
+            move = decode_move(game_state, code)
+            move.execute(game_state)
+            yield move, game_state
+
+
+class ArchivedChessGame(ArchivedGame):
+    "A chess game of an archive"
+    game = CHESS
+    start_fen = START_FENS[CHESS]
+    from_fen = staticmethod(chess_fen.from_fen)
+    load_fen = staticmethod(chess_fen.load_fen)
+
+
+class ArchivedCheckersGame(ArchivedGame):
+    "A checkers game of an archive"
+    game = CHECKERS
+    start_fen = START_FENS[CHECKERS]
+    from_fen = staticmethod(pdn.from_fen)
+    load_fen = staticmethod(pdn.load_fen)
+
+
+# game -> class of its archived games
+ARCHIVED_GAMES = {CHESS: ArchivedChessGame, CHECKERS: ArchivedCheckersGame}
+
+
+class GameArchive:
+    """
+    Random access to the games of an archive through mmap
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as archive, open(index_path(path), "rb") as index:
+            self._archive = mmap.mmap(archive.fileno(), 0, access=mmap.ACCESS_READ)
+            self._index = mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ)
+        for data, magic in ((self._archive, ARCHIVE_MAGIC), (self._index, INDEX_MAGIC)):
+            if len(data) < FILE_HEADER.size or FILE_HEADER.unpack_from(data) != (magic, VERSION):
+                self.close()
+                raise ValueError(f"{path} is not a version {VERSION} game archive")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._archive.close()
+        self._index.close()
+
+    def __len__(self):
+        return (len(self._index) - FILE_HEADER.size) // OFFSET.size
+
+    def __getitem__(self, n):
+        """Game number n, counting from 0
+
+        Raises:
+            IndexError: if there is no such game
+        """
+        if n < 0:
+            n += len(self)
+        if not 0 <= n < len(self):
+            raise IndexError(f"game {n} is not in the archive")
+        (offset,) = OFFSET.unpack_from(self._index, FILE_HEADER.size + n * OFFSET.size)
+        game, result, fen_length, plies = GAME_HEADER.unpack_from(self._archive, offset)
+        offset += GAME_HEADER.size
+        fen = self._archive[offset:offset + fen_length].decode("ascii")
+        offset += fen_length
+        codes = self._archive[offset:offset + plies * MOVE.size]
+        return ARCHIVED_GAMES[GAMES[game]](RESULTS[result], fen, codes)
+
+    def __iter__(self):
+        for n in range(len(self)):
+            yield self[n]
+
+    def state_at(self, n, ply, board_class=Board):
+        """Builds a new game state in the position of game n after the given number of moves
+
+        Raises:
+            IndexError: if there is no such game or ply
+        """
+        return self[n].state_at(ply, board_class)
@@ -0,0 +1,132 @@
+from copy import deepcopy
+
+
+def replay_move(game_state, move):
+    """Executes the move of game_state between the same squares as a move made on another copy of the game
+
+    Moves refer to the spaces of the board they were generated on, so a recorded move
+    can only be executed directly on that board.
+
+    Returns:
+        Move: the move executed on game_state
+    """
+    board = game_state.board
+    start = board.square(move._start)
+    end = board.square(move._end)
+    captures = [board.square(cap) for cap in move._captures]
+    for m in game_state.all_possible_moves():
+        if board.square(m._start) == start and board.square(m._end) == end and \
+                [board.square(cap) for cap in m._captures] == captures:
+            m.execute(game_state)
+            return m
+    raise ValueError(f"{move} is not a legal move in this position")
+
+
+class GameHistory():
+    """
+    Undo and redo for a game played on a single game state, stored as the moves that were executed
+    rather than as copies of the game state, so each ply only costs a move object.
+
+    Undo and redo run Move.undo and Move.execute on the game state in place.
+    A copy of the game state, or keyframe, is kept for the start of the game and optionally every
+    keyframe_interval plies, so that state_at can rebuild any earlier position without
+    touching the game in progress by replaying moves from the nearest keyframe.
+    """
+
+    def __init__(self, game_state, keyframe_interval=None):
+        """
+        Args:
+            game_state (GameState): game state in the position the history starts from
+            keyframe_interval (int, optional): plies between keyframes after the first. Defaults to None,
+                which only keeps the starting position.
+        """
+        self._keyframe_interval = keyframe_interval
+        # ply -> copy of the game state at that ply
+        self._keyframes = {0: deepcopy(game_state)}
+
+        # moves that have been executed, which can be reached with undo
+        self._undo_stack = []
+
+        # moves taken back by undo, most recent last, which can be reached with redo
+        self._redo_stack = []
+
+    @property
+    def ply(self):
+        "Number of moves between the starting position and the current one"
+        return len(self._undo_stack)
+
+    @property
+    def start(self):
+        "Copy of the game state in the starting position, which must not be changed"
+        return self._keyframes[0]
+
+    @property
+    def moves(self):
+        "Moves from the starting position to the current one, in the order they were played"
+        return list(self._undo_stack)
+
+    def push(self, move, game_state):
+        """Saves a move that has just been executed on the game state and invalidates any potential redos
+
+        Args:
+            move (Move): move that was executed
+            game_state (GameState): game state the move was executed on, copied when a keyframe is due
+        """
+        self._undo_stack.append(move)
+        if self._redo_stack:
+            self._redo_stack = []
+            # keyframes past this point belong to the moves that were undone
+            for ply in [ply for ply in self._keyframes if ply >= self.ply]:
+                del self._keyframes[ply]
+        if self._keyframe_interval and self.ply % self._keyframe_interval == 0:
+            self._keyframes[self.ply] = deepcopy(game_state)
+
+    def undo(self, gs):
+        """Takes back the last move
+
+        Args:
+            gs (GameState): game state the moves were executed on
+
+        Returns:
+            Move: the move that was undone, or None if there are no moves to undo
+        """
+        if len(self._undo_stack) == 0:
+            return None
+        move = self._undo_stack.pop()
+        move.undo(gs)
+        self._redo_stack.append(move)
+        return move
+
+    def redo(self, gs):
+        """Plays the last move taken back by undo again
+
+        Args:
+            gs (GameState): game state the moves were executed on
+
+        Returns:
+            Move: the move that was redone, or None if there are no moves to redo
+        """
+        if len(self._redo_stack) == 0:
+            return None
+        move = self._redo_stack.pop()
+        move.execute(gs)
+        self._undo_stack.append(move)
+        return move
+
+    def state_at(self, ply):
+        """Builds a new game state in the position after the given number of moves
+
+        Args:
+            ply (int): number of moves from the starting position, up to the number of moves that can be redone
+
+        Returns:
+            GameState: a game state independent of the one the game is being played on
+        """
+        moves = self._undo_stack + self._redo_stack[::-1]
+        if not 0 <= ply <= len(moves):
+            raise IndexError(f"ply {ply} is not in the history")
+        start = max(p for p in self._keyframes if p <= ply)
+        game_state = deepcopy(self._keyframes[start])
+        for move in moves[start:ply]:
+            replay_move(game_state, move)
+        return game_state
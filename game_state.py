@@ -1,7 +1,11 @@
 from constants import BLACK, WHITE
+from zobrist import side_key
 
 
 class GameState():
+    # list type that collects a position's moves, games override it to enforce rules across pieces such as forced jumps
+    move_set = list
+
     def __init__(self, board, side, players):
         
         self._players = players
@@ -11,6 +15,14 @@ class GameState():
         self._board = board
         # public property
         self._draw_counter = 0
+        # results worked out for the current position, such as its move list, cleared whenever a move is executed or undone
+        self._position_cache = {}
+
+    def __getstate__(self):
+        # copies and pickles start without cached results, which are cheap to work out again
+        state = self.__dict__.copy()
+        state["_position_cache"] = {}
+        return state
 
     @property
     def current_side(self):
@@ -20,6 +32,11 @@ class GameState():
     def board(self):
         return self._board
 
+    @property
+    def zobrist_key(self):
+        "64-bit key identifying the pieces on the board and the side to move"
+        return self._board.zobrist_key ^ side_key(self._current_side)
+
     @property
     def draw_counter(self):
         return self._draw_counter
@@ -31,10 +48,12 @@ class GameState():
     def next_turn(self):
         self._current_side = not self._current_side
         self._turn_counter += 1
+        self._position_cache.clear()
 
     def prev_turn(self):
         self._current_side = not self._current_side
         self._turn_counter -= 1
+        self._position_cache.clear()
 
     def __str__(self):
         if self._current_side == WHITE:
@@ -51,23 +70,97 @@ class GameState():
         Args:
             side ([type], optional): side for which moves should be retrieved. Defaults to the game state's current side.
 
+        The list is kept until the next move is executed or undone, so asking again for the same
+        position returns the same list, which callers must not modify.
+
         Returns:
             list: list of Move objects 
         """
-        if not side:
+        if side is None:
+            side = self._current_side
+        options = self._position_cache.get(("moves", side))
+        if options is not None:
+            return options
+        options = self.move_set()
+        for moves in self.piece_moves(side):
+            options.extend(moves)
+
+        self._position_cache[("moves", side)] = options
+        return options
+
+    def has_any_legal_move(self, side=None):
+        "Whether a side has at least one move, stopping at the first piece that can move"
+        if side is None:
+            side = self._current_side
+        options = self._position_cache.get(("moves", side))
+        if options is not None:
+            return len(options) > 0
+        for moves in self.piece_moves(side):
+            if moves:
+                return True
+        return False
+
+    def capture_moves(self, side=None):
+        """Collects only the moves that capture, in the same list type as all_possible_moves
+
+        Unlike all_possible_moves the list is not kept. For games where captures are mandatory
+        the list's has_jump tells whether these are all of the side's legal moves.
+        """
+        if side is None:
             side = self._current_side
-        pieces = self._board.pieces_iterator(side)
-        options = []
-        for piece in pieces:
-            options.extend(piece.enumerate_moves())
+        options = self.move_set()
+        for moves in self.piece_moves(side, captures_only=True):
+            options.extend(moves)
+        return options
 
+    def quiet_moves(self, side=None):
+        """Collects the moves that do not capture, which are only legal if capture_moves did not find mandatory captures
+
+        Captures are not generated at all, so checkers jumps are not searched for a second time after capture_moves.
+        """
+        if side is None:
+            side = self._current_side
+        options = self.move_set()
+        for moves in self.piece_moves(side, quiet_only=True):
+            options.extend(moves)
         return options
 
+    def find_move(self, start, end):
+        """The current side's move from start to end, or None if the piece there has no such move
+
+        Only the moves of the piece on start are generated, so rules across pieces are not checked
+        and the move must already be known to be legal, such as a move stored for the same position.
+        """
+        piece = start.piece
+        if piece is None or piece.side != self._current_side:
+            return None
+        for move in piece.enumerate_moves():
+            if move._end is end:
+                return move
+        return None
+
+    def piece_moves(self, side, captures_only=False, piece_class=None, quiet_only=False):
+        """Yields the list of moves of each of a side's pieces in turn
+
+        Games whose rules remove moves from what pieces generate, such as moves that leave a king in check, override this.
+
+        Args:
+            side (bool): side whose moves are generated
+            captures_only (bool, optional): only generate the moves that capture. Defaults to False.
+            piece_class (type, optional): only generate the moves of pieces of this class, which skips rules
+                across pieces such as forced jumps. Defaults to None for all pieces.
+            quiet_only (bool, optional): only generate the moves that do not capture, without checking for captures
+                that rules may make mandatory. Defaults to False.
+        """
+        for piece in self._board.pieces_iterator(side):
+            if piece_class is None or type(piece) is piece_class:
+                yield piece.enumerate_moves(captures_only, quiet_only)
+
     def check_draw(self, side=None):
-        if not side:
+        if side is None:
             side = self._current_side
         # no moves available
-        if len(self.all_possible_moves(side)) == 0:
+        if not self.has_any_legal_move(side):
             return True
         # 50 turn rule
         if self._draw_counter >= 50:
@@ -75,21 +168,25 @@ class GameState():
         # default to no draw
         return False
 
+    def in_check(self, side=None):
+        "Whether a side's king is under attack, always False for games without check"
+        return False
+
+    def is_attacked(self, space, side, empty=None):
+        """Whether a piece of side could capture on space, treating the space empty as vacated.
+        Games without attack detection always return False.
+        """
+        return False
+
     def check_loss(self, side=None):
         # Specific rules for loss should be implemented per game
         raise NotImplementedError()
 
     def evaluate(self, side=None):
-        if not side:
+        """Material and piece-square score of a side relative to its opponent, in evaluation units
+
+        The board keeps both sides' scores up to date as moves are made, so this does not look at the pieces.
+        """
+        if side is None:
             side = self._current_side
-        white_pieces = self._board.pieces_iterator(WHITE)
-        black_pieces = self._board.pieces_iterator(BLACK)
-        white_score = 0
-        black_score = 0
-        for piece in white_pieces:
-            white_score += piece._val
-        for piece in black_pieces:
-            black_score += piece._val
-        if side == WHITE:
-            return white_score - black_score
-        return black_score - white_score
+        return self._board.score(side)
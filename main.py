@@ -1,75 +1,54 @@
 from constants import BLACK, BOARD_SIZE, WHITE
 from board import Board
 from players import Player, HumanPlayer
-from copy import deepcopy
+from game_history import GameHistory
 import sys
 
+USAGE = """usage: python main.py [chess|checkers] [player1] [player2] [on|off] [fen] [record file]
+players: human, random, greedy, minimax[depth][t<seconds per move>][n<nodes per move>][p<processes>]
+    e.g. minimax5 searches 5 plies, minimaxt2.5 deepens iteratively for 2.5 seconds per move,
+    minimax6p8 searches 6 plies on 8 processes (p only works with a fixed depth)
+fen: starting position, a FEN for chess or a PDN FEN for checkers, or - for the usual start
+record file: file the game is added to when it ends, in PGN for chess or PDN for checkers"""
+
 from checkers.pieces import CheckerFactory
 from checkers.game_state import CheckersGameState
 from chess.pieces import ChessFactory
 from chess.game_state import ChessGameState
-
-
-class GameHistory():
-    def __init__(self):
-        # stack of old game states that can be reached with undo
-        self._undo_stack = []
-
-        # temporary stack of game states built as undo is called
-        self._redo_stack = []
-
-    def push(self, gs):
-        """Saves a new game state and invalidates any potential redos
-
-        Args:
-            gs GameState): current game state to add to undo stack
-        """
-        self._undo_stack.append(gs)
-        self._redo_stack = []
-
-    def undo(self, gs):
-        """
-        Args:
-            gs (GameState): current game state to add to redo stack. 
-
-        Returns:
-            GameState: previous game state from undo stack
-        """
-
-        if len(self._undo_stack) == 0:
-            return None
-        x = self._undo_stack.pop()
-        self._redo_stack.append(gs)
-        return x
-
-    def redo(self, gs):
-        """
-        Args:
-            gs (GameState): current game state to add to undo stack
-
-        Returns:
-            GameState: game state most recently added to redo stack by an undo
-        """
-
-        if len(self._redo_stack) == 0:
-            return None
-        self._undo_stack.append(gs)
-        return self._redo_stack.pop()
+from chess.fen import load_fen
+from chess import pgn
+from checkers import pdn
 
 
 class GameDriver:
     def __init__(self, player1=HumanPlayer(),
                  player2=HumanPlayer(),
-                 history_enabled=False, checkers=False):
+                 history_enabled=False, checkers=False, fen=None, record=None):
+        """
+        Args:
+            fen (str, optional): position to start from, a FEN for chess or a PDN FEN for checkers. Defaults to None
+                for the usual starting position.
+            record (file, optional): open text file the game is written to when it ends, in PGN for chess or
+                PDN for checkers. Defaults to None.
+        """
 
         # create board, set up, and initialize game state
         b = Board(int(BOARD_SIZE), ChessFactory())
         if checkers:
             b = Board(int(BOARD_SIZE), CheckerFactory())
         b.set_up()
-        self._game_state = ChessGameState(b, WHITE, None)
         if checkers:
             self._game_state = CheckersGameState(b, WHITE, None)
+            self._write_game = pdn.write_game
+        else:
+            self._game_state = ChessGameState(b, WHITE, None)
+            self._write_game = pgn.write_game
+        if fen:
+            # resume a game from a position instead of the starting position
+            if checkers:
+                pdn.load_fen(self._game_state, fen)
+            else:
+                load_fen(self._game_state, fen)
 
         # set up players
         self._players = {
@@ -79,10 +58,12 @@ class GameDriver:
         player1.side = WHITE
         player2.side = BLACK
 
-        # set up history
-        if history_enabled:
-            self._history = GameHistory()
+        # set up history, which also keeps the moves for the record
+        self._history = None
+        if history_enabled or record:
+            self._history = GameHistory(self._game_state)
         self.history_enabled = history_enabled
+        self._record = record
 
     def start_game(self):
         # game loop
@@ -92,12 +73,15 @@ class GameDriver:
             if self._game_state.check_loss():
                 if self._game_state.current_side == WHITE:
                     print("black has won")
+                    self.write_record("0-1")
                 else:
                     print("white has won")
+                    self.write_record("1-0")
                 return
 
             if self._game_state.check_draw():
                 print("draw")
+                self.write_record("1/2-1/2")
                 return
 
             if self.history_enabled:
@@ -107,22 +91,22 @@ class GameDriver:
                 option = "next"
 
             if option == "undo":
-                last_state = self._history.undo(self._game_state)
-                if last_state:
-                    self._game_state = last_state
+                self._history.undo(self._game_state)
             elif option == "redo":
-                next_state = self._history.redo(self._game_state)
-                if next_state:
-                    self._game_state = next_state
+                self._history.redo(self._game_state)
             elif option == "next":
-                # copy the old state before making a move
-                prev_state = deepcopy(self._game_state)
-
                 player = self._players[self._game_state.current_side]
-                player.take_turn(self._game_state)
+                move = player.take_turn(self._game_state)
+
+                if self._history is not None:
+                    self._history.push(move, self._game_state)
 
-                if self.history_enabled:
-                    self._history.push(prev_state)
+    def write_record(self, result):
+        "Writes the moves played so far to the record file, if there is one"
+        if not self._record:
+            return
+        tags = {side_name: type(self._players[side]).__name__ for side_name, side in (("White", WHITE), ("Black", BLACK))}
+        self._write_game(self._record, self._history.start, self._history.moves, tags, result)
 
 
 if __name__ == "__main__":
@@ -137,18 +121,25 @@ if __name__ == "__main__":
     if len(sys.argv) > 2:
         player1 = Player.create_player(sys.argv[2])
         if not player1:
-            sys.exit()
+            sys.exit(USAGE)
     else:
         player1 = Player.create_player("human")
     if len(sys.argv) > 3:
         player2 = Player.create_player(sys.argv[3])
         if not player2:
-            sys.exit()
+            sys.exit(USAGE)
     else:
         player2 = Player.create_player("human")
 
     history = len(sys.argv) > 4 and sys.argv[4] == "on"
+    fen = sys.argv[5] if len(sys.argv) > 5 and sys.argv[5] != "-" else None
+    record = open(sys.argv[6], "a") if len(sys.argv) > 6 else None
 
     # create driver and start game
-    game = GameDriver(player1, player2, history, checkers)
+    try:
+        game = GameDriver(player1, player2, history, checkers, fen, record)
+    except ValueError as e:
+        sys.exit(f"{e}\n{USAGE}")
     game.start_game()
+    if record:
+        record.close()
@@ -1,7 +1,7 @@
 from constants import BLACK, BOARD_SIZE, WHITE
 from board import Board
 from playersGUI import Player, HumanPlayer
-from copy import deepcopy
+from game_history import GameHistory
 import sys
 import tkinter
 import tkinter.font as font
@@ -16,53 +16,6 @@ from chess.game_state import ChessGameState
 
 
 
-class GameHistory():
-    def __init__(self):
-        # stack of old game states that can be reached with undo
-        self._undo_stack = []
-
-        # temporary stack of game states built as undo is called
-        self._redo_stack = []
-
-    def push(self, gs):
-        """Saves a new game state and invalidates any potential redos
-
-        Args:
-            gs GameState): current game state to add to undo stack
-        """
-        self._undo_stack.append(gs)
-        self._redo_stack = []
-
-    def undo(self, gs):
-        """
-        Args:
-            gs (GameState): current game state to add to redo stack. 
-
-        Returns:
-            GameState: previous game state from undo stack
-        """
-
-        if len(self._undo_stack) == 0:
-            return None
-        x = self._undo_stack.pop()
-        self._redo_stack.append(gs)
-        return x
-
-    def redo(self, gs):
-        """
-        Args:
-            gs (GameState): current game state to add to undo stack
-
-        Returns:
-            GameState: game state most recently added to redo stack by an undo
-        """
-
-        if len(self._redo_stack) == 0:
-            return None
-        self._undo_stack.append(gs)
-        return self._redo_stack.pop()
-
-
 class Menu:
     def __init__(self, player1=HumanPlayer(),
                  player2=HumanPlayer(),
@@ -112,9 +65,7 @@ class Menu:
 
         # set up history
         if history_enabled:
-            self._history = GameHistory()
-            self._last_state = None
-            self._next_state = None
+            self._history = GameHistory(self._game_state)
             self._next_called = True
 
 
@@ -156,18 +107,15 @@ class Menu:
                 self._boardGUI[x][y].grid(row=x,column=y)
                 self._boardGUI[x][y]['command'] = lambda x=x, y=y: self.button_click(x, y)
 
-        self.prev_state = deepcopy(self._game_state)
-
         self._cur_player = self._players[self._game_state.current_side]
         ttk.Label(self.title_frame, text = str(self._game_state).split("\n")[-1]).pack()
 
-        if self.history_enabled:
-            self._history.push(self.prev_state)
-
         if not self.history_enabled and str(type(player1)) != "<class 'playersGUI.HumanPlayer'>" and str(type(player2)) != "<class 'playersGUI.HumanPlayer'>":
             self.bot_turn()
         elif str(type(self._cur_player)) != "<class 'playersGUI.HumanPlayer'>":
-            self._cur_player.take_turn(self._game_state)
+            move = self._cur_player.take_turn(self._game_state)
+            if self.history_enabled:
+                self._history.push(move, self._game_state)
             self.refresh_colors()
             self._cur_player = self._players[self._game_state.current_side]
 
@@ -175,33 +123,26 @@ class Menu:
 
 
     def undo_board(self):
-        self._last_state = self._history.undo(self._game_state)
-        if self._last_state:
-            self._game_state = self._last_state
+        self._history.undo(self._game_state)
 
         self.refresh_colors()
         self._cur_player = self._players[self._game_state.current_side]
         self._next_called = False
 
     def redo_board(self):
-        self._next_state = self._history.redo(self._game_state)
-        if self._next_state:
-            self._game_state = self._next_state
+        self._history.redo(self._game_state)
         self.refresh_colors()
         self._cur_player = self._players[self._game_state.current_side]
         self._next_called = False
 
     def next_board(self):
-        self.prev_state = deepcopy(self._game_state)
-
         self._cur_player = self._players[self._game_state.current_side]
         self._next_called = True
 
         if self.history_enabled:
-            self._history.push(self.prev_state)
-
             if str(type(self._cur_player)) != "<class 'playersGUI.HumanPlayer'>":
-                self._cur_player.take_turn(self._game_state)
+                move = self._cur_player.take_turn(self._game_state)
+                self._history.push(move, self._game_state)
                 self.refresh_colors()
                 self._cur_player = self._players[self._game_state.current_side]
                 self._next_called = True
@@ -316,6 +257,8 @@ class Menu:
 
     def execute_move(self, move):
         move.execute(self._game_state)
+        if self.history_enabled:
+            self._history.push(move, self._game_state)
         self.refresh_colors()
 
         self._cur_player = self._players[self._game_state.current_side]
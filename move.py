@@ -1,20 +1,24 @@
+# shared by every move that captures nothing, so that quiet moves do not each allocate an empty list
+NO_CAPTURES = ()
+
+
 class Move:
     """
     Implements a command pattern for moves
     start and end must be space objects
     captures may be empty
+
+    Thousands of moves are generated per search node, so they use __slots__ instead of an instance dict,
+    and what execute needs to remember for undo is only set once the move is executed.
     """
+    __slots__ = ("_start", "_end", "_captures", "_promotion", "_promoted_piece", "_captured_pieces",
+                 "_prev_draw_counter")
 
     def __init__(self, start, end, captures=None, promotion=False):
         self._start = start
         self._end = end
-        if captures == None:
-            self._captures = []
-        else:
-            self._captures = captures
+        self._captures = captures if captures else NO_CAPTURES
         self._promotion = promotion
-        self._promoted_piece = None
-        self._captured_pieces = {}
 
     def __str__(self) -> str:
         return f"move: {self._start}->{self._end}"
@@ -25,20 +29,28 @@ class Move:
     def execute(self, game_state):
         "Interacts with the start end and capture Space objects to carry out this move command"
 
+        board = game_state.board
+
         # capture first so we don't overwrite the piece
-        for cap in self._captures:
-            self._captured_pieces[cap] = cap.piece
-            cap.piece = None
+        if self._captures:
+            self._captured_pieces = [cap.piece for cap in self._captures]
+            for cap in self._captures:
+                board.piece_removed(cap.piece, cap)
+                cap.piece = None
 
         if not self._start is self._end:
+            board.piece_removed(self._start.piece, self._start)
             self._end.piece = self._start.piece  # move to new space
             self._start.piece = None             # clear old space
             self._end.piece.move(self._end)      # update piece object
+            board.piece_added(self._end.piece, self._end)
 
         # promote piece
         if self._promotion:
             self._promoted_piece = self._end.piece
             self._end.piece = self._end.piece.promote()
+            board.piece_removed(self._promoted_piece, self._end)
+            board.piece_added(self._end.piece, self._end)
 
         # advance turn and update draw counter
         game_state.next_turn()
@@ -58,19 +70,27 @@ class Move:
         else:
             game_state.draw_counter -= 1
 
+        board = game_state.board
+
         # undo promotion
-        if self._promoted_piece:
+        if self._promotion:
+            board.piece_removed(self._end.piece, self._end)
+            board.piece_added(self._promoted_piece, self._end)
             self._end.piece = self._promoted_piece
 
         # undo move
         if not self._start is self._end:
+            board.piece_removed(self._end.piece, self._end)
             self._start.piece = self._end.piece
             self._end.piece = None
             self._start.piece.move(self._start)
+            board.piece_added(self._start.piece, self._start)
 
         # undo captures
-        for space, piece in self._captured_pieces.items():
-            space.piece = piece
+        if self._captures:
+            for space, piece in zip(self._captures, self._captured_pieces):
+                space.piece = piece
+                board.piece_added(piece, space)
 
     def add_promotion(self):
         self._promotion = True
@@ -0,0 +1,133 @@
+# ordering score tiers, from first searched to last
+CAPTURE_SCORE = 1 << 50
+KILLER_SCORE = 1 << 40
+# number of killer moves remembered per ply
+KILLERS_PER_PLY = 2
+
+
+def move_key(move):
+    """Identifies a move by the coordinates of its start and end spaces, so it is recognised in sibling nodes
+    and on copies of the board such as the unpickled boards of parallel search workers"""
+    return move._start._row, move._start._col, move._end._row, move._end._col
+
+
+class MoveOrderer:
+    """
+    Orders moves for alpha-beta search so that cutoffs happen as early as possible:
+    the hash move first, then captures by most valuable victim / least valuable attacker,
+    then killer moves for the ply, then the remaining quiet moves by history score.
+    """
+
+    def __init__(self):
+        # ply -> most recent killer move keys first
+        self._killers = {}
+        # move key -> sum of depth squared over the cutoffs the move caused
+        self._history = {}
+
+        # counters for judging ordering quality
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        # counters for staged generation: positions whose moves were staged, how many of those got as far as
+        # generating their quiet moves, and the moves generated across all stages
+        self.staged_positions = 0
+        self.quiet_stages = 0
+        self.generated = 0
+
+    def new_search(self):
+        "Forgets killers from the last search and ages the history scores"
+        self._killers = {}
+        for key in self._history:
+            self._history[key] //= 2
+
+    def order(self, options, ply):
+        """Indices of options in the order they should be searched
+
+        The hash move is not scored here since staged_moves searches it before generating any other moves.
+
+        Args:
+            options (list): moves of the current position, which must not have been executed yet
+            ply (int): distance from the root of the search
+        """
+        killers = self._killers.get(ply, ())
+        history = self._history
+        scores = []
+        for move in options:
+            if move._captures:
+                # most valuable victim, least valuable attacker
+                scores.append(CAPTURE_SCORE + move.capture_value() * 1024 - move._start.piece._val)
+            else:
+                key = move_key(move)
+                if key in killers:
+                    scores.append(KILLER_SCORE - killers.index(key))
+                else:
+                    scores.append(history.get(key, 0))
+        return sorted(range(len(options)), key=scores.__getitem__, reverse=True)
+
+    def staged_moves(self, game_state, ply, hash_move=None):
+        """Yields the current position's moves in search order, generating each stage only once the previous
+        stages have been searched without a cutoff
+
+        The stages are the hash move, captures by most valuable victim / least valuable attacker,
+        and then the quiet moves with killers first and the rest by history score. Killers are
+        picked out of the quiet moves rather than generated on their own since checking that
+        a killer is legal takes generating its piece's moves anyway.
+
+        Args:
+            game_state (GameState): position to generate moves for, which must be back in the same position
+                whenever the next move is asked for
+            ply (int): distance from the root of the search
+            hash_move (Move, optional): legal move to search first, such as the transposition table move. Defaults to None.
+        """
+        self.staged_positions += 1
+        if hash_move is not None:
+            self.generated += 1
+            yield hash_move
+
+        captures = game_state.capture_moves()
+        self.generated += len(captures)
+        for i in self.order(captures, ply):
+            if hash_move is None or not captures[i] == hash_move:
+                yield captures[i]
+        if captures.has_jump:
+            # captures are mandatory so there are no quiet moves to search
+            return
+
+        self.quiet_stages += 1
+        quiets = game_state.quiet_moves()
+        self.generated += len(quiets)
+        for i in self.order(quiets, ply):
+            if hash_move is None or not quiets[i] == hash_move:
+                yield quiets[i]
+
+    def record_cutoff(self, move, ply, depth, move_number):
+        """Updates killers and history after a move caused a beta cutoff
+
+        Args:
+            move (Move): move that caused the cutoff
+            ply (int): distance from the root of the search
+            depth (int): remaining depth of the node
+            move_number (int): how many moves were searched before this one at the node
+        """
+        self.cutoffs += 1
+        if move_number == 0:
+            self.first_move_cutoffs += 1
+        if move._captures:
+            # captures are already ordered well by their value
+            return
+        key = move_key(move)
+        killers = self._killers.setdefault(ply, [])
+        if key not in killers:
+            killers.insert(0, key)
+            del killers[KILLERS_PER_PLY:]
+        self._history[key] = self._history.get(key, 0) + depth * depth
+
+    def stats(self):
+        "Returns the counters as a dict, including the percentage of cutoffs made by the first move searched"
+        return {
+            "cutoffs": self.cutoffs,
+            "first_move_cutoffs": self.first_move_cutoffs,
+            "first_move_cutoff_pct": round(100 * self.first_move_cutoffs / self.cutoffs, 1) if self.cutoffs else 0.0,
+            "staged_positions": self.staged_positions,
+            "quiet_stages": self.quiet_stages,
+            "generated": self.generated,
+        }
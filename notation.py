@@ -0,0 +1,137 @@
+"""
+Tag pairs and movetext, the text format shared by PGN for chess and PDN for checkers
+
+A game is a block of tag pair lines such as [Event "Club match"], followed by its moves with
+their move numbers and ending with the result. Games are read one at a time from any iterable
+of lines, so files of any size can be read without loading them into memory.
+"""
+import re
+
+from board import Board
+
+_TAG = re.compile(r'\[(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+_ESCAPE = re.compile(r"\\(.)")
+_MOVE_NUMBER = re.compile(r"^\d+\.+")
+# comments in braces, which can span lines, variations in parentheses, comments to the end of the line and other tokens
+_TOKEN = re.compile(r"\{[^}]*\}?|\}|\(|\)|;.*|[^\s(){};]+")
+
+# longest line written, as recommended for PGN export
+LINE_LENGTH = 79
+
+
+class GameRecord:
+    """
+    A game read from a file: its tags, its moves as the file stores them and its result
+
+    Each format sets start_fen to the position of games without a FEN tag, and from_fen and load_fen
+    to its functions that build a new game state from a FEN and load one into an existing game state.
+    """
+    start_fen = None
+    from_fen = None
+    load_fen = None
+
+    def __init__(self, tags=None, moves=None, result="*"):
+        # tag name -> value, such as "Event" or "FEN"
+        self.tags = tags if tags is not None else {}
+        self.moves = moves if moves is not None else []
+        self.result = result
+
+    def start(self, board_class=Board, game_state=None):
+        """Game state in the game's starting position, from its FEN tag or start_fen
+
+        Args:
+            board_class (type, optional): board for a new game state. Defaults to Board.
+            game_state (GameState, optional): game state of the same game to load the position into instead of
+                building a new one, which is much faster when replaying many games. Defaults to None.
+        """
+        fen = self.tags.get("FEN", self.start_fen)
+        if game_state is None:
+            return self.from_fen(fen, board_class)
+        self.load_fen(game_state, fen)
+        return game_state
+
+
+def read_records(lines, results, record_class=GameRecord):
+    """Yields a record for each game in an iterable of lines, such as an open file
+
+    Only the current game is held in memory. Comments, variations, annotations and move numbers
+    are skipped, and every other token before the result is kept as the text of a move.
+
+    Args:
+        lines (iterable): lines of text
+        results (tuple): tokens that end a game, such as "1-0"
+        record_class (type, optional): GameRecord subclass to create for each game. Defaults to GameRecord.
+    """
+    game = None
+    comment = False
+    variation = 0
+    for line in lines:
+        stripped = line.strip()
+        if not comment and stripped.startswith("%"):
+            # escaped line, which is ignored by readers
+            continue
+        if not comment and variation == 0 and stripped.startswith("["):
+            if game is not None and game.moves:
+                # a tag after moves starts the next game even without a result
+                yield game
+                game = None
+            if game is None:
+                game = record_class()
+            for name, value in _TAG.findall(stripped):
+                game.tags[name] = _ESCAPE.sub(r"\1", value)
+            continue
+        for token in _TOKEN.findall(stripped):
+            if comment:
+                if "}" in token:
+                    comment = False
+                continue
+            if token.startswith("{"):
+                comment = not token.endswith("}")
+                continue
+            if token.startswith(";"):
+                # the rest of the line is a comment
+                break
+            if token == "(":
+                variation += 1
+                continue
+            if token == ")":
+                variation = max(variation - 1, 0)
+                continue
+            if variation or token.startswith("$") or token == "}":
+                continue
+            # move numbers may be written without a space before the move
+            token = _MOVE_NUMBER.sub("", token)
+            if not token:
+                continue
+            if game is None:
+                game = record_class()
+            if token in results:
+                game.result = token
+                yield game
+                game = None
+            else:
+                game.moves.append(token)
+    if game is not None and (game.moves or game.tags):
+        yield game
+
+
+def write_record(file, tags, tokens):
+    """Writes the tag pairs of a game and its movetext, wrapped at LINE_LENGTH
+
+    Args:
+        file: text file to write to
+        tags (dict): tag name -> value
+        tokens (list): movetext tokens in order, including move numbers and ending with the result
+    """
+    for name, value in tags.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        file.write(f'[{name} "{value}"]\n')
+    if tags:
+        file.write("\n")
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > LINE_LENGTH:
+            file.write(line + "\n")
+            line = ""
+        line = f"{line} {token}" if line else token
+    file.write(line + "\n\n")
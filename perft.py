@@ -0,0 +1,159 @@
+"""
+Perft: counts the leaf nodes of the full move generation tree to a fixed depth
+
+Chess counts are for legal moves, but this chess has no castling, en passant or underpromotion,
+so they only match published chess perft numbers while none of those are possible (depth 4 from
+the starting position). Checkers counts match the published numbers for English draughts.
+
+usage: python perft.py check [max_depth] [bitboard]
+       python perft.py divide [chess|checkers] depth [moves...]
+       python perft.py bench [chess|checkers] depth [bitboard]
+"""
+import sys
+import time
+
+from constants import BOARD_SIZE, CHECKERS, CHESS, WHITE
+from board import Board
+from bitboard import BitBoard
+
+from checkers.pieces import CheckerFactory
+from checkers.game_state import CheckersGameState
+from chess.pieces import ChessFactory
+from chess.game_state import ChessGameState
+
+
+# (name, game, moves from the starting position, expected leaf counts for depths 1, 2, ...)
+REFERENCE_POSITIONS = [
+    ("chess start", CHESS, "", [20, 400, 8902, 197281]),
+    ("chess opening", CHESS, "c7c5 h2h4 a7a6 b2b4 b7b5 e2e3 b8c6 g1e2 a8b8 d2d3 g8h6 d1d2",
+     [27, 731, 20940]),
+    ("chess rook check", CHESS, "g8h6 b2b3 b7b5 b3b4 a7a5 d2d4 a5b4 c1h6 h8g8 d1c1 a8a2 a1a2 b8a6 e1d2 "
+     "f7f6 g2g4 f6f5 h6g7 g8g7 g4f5 g7g1 a2a6 f8h6",
+     [6, 150, 5188, 136791]),
+    ("chess knight check", CHESS, "g8h6 d2d4 h6g8 c1f4 d7d6 b1c3 c8d7 f4g3 d7f5 c3b5 f5c2 g1f3 b8c6 d1d3 "
+     "d8b8 d3c2 c6e5 f3e5 h7h6 b5c7",
+     [2, 91, 1968, 81292]),
+    ("checkers start", CHECKERS, "", [7, 49, 302, 1469, 7361, 36768, 179740]),
+    ("checkers black king", CHECKERS, "h6g5 g3f4 g5h4 h2g3 b6c5 c3d4 g7h6 d4b6 c7a5 d2c3 f8g7 a3b4 "
+     "d6e5 f4f8 a7b6 e3d4 b8a7 d4c5 b6d4 c3e5",
+     [2, 10, 24, 124, 550]),
+    ("checkers endgame", CHECKERS, "d6c5 e3d4 c5e3 f2d4 b6a5 d2e3 a5b4 c3a5 c7d6 g3h4 d6c5 d4b6 "
+     "a7c5 a3b4 c5a3 e3d4 b8a7 d4e5 f6d4 e1d2 a7b6 a5c7 d8b6 b2c3 d4b2 a1c3 g7f6 c3b4 b6c5 "
+     "b4d6 e7c5 h4g5 f6h4 d2c3 h4g3 h2f4 c5d4 c3e5 f8g7 g1h2",
+     [3, 3, 5, 9, 16]),
+]
+
+
+def new_game_state(game, board_class=Board):
+    "Returns a game state in the starting position for CHESS or CHECKERS"
+    if game == CHECKERS:
+        b = board_class(int(BOARD_SIZE), CheckerFactory())
+        b.set_up()
+        return CheckersGameState(b, WHITE, None)
+    b = board_class(int(BOARD_SIZE), ChessFactory())
+    b.set_up()
+    return ChessGameState(b, WHITE, None)
+
+
+def find_move(game_state, text):
+    """Finds the current side's move written as start and end coordinates, such as e7e5
+
+    Raises:
+        ValueError: if no move or more than one move matches
+    """
+    matches = [m for m in game_state.all_possible_moves() if f"{m._start}{m._end}" == text]
+    if len(matches) != 1:
+        raise ValueError(f"{text} matches {len(matches)} moves")
+    return matches[0]
+
+
+def play_moves(game_state, moves):
+    "Executes a space separated list of moves on the game state"
+    for text in moves.split():
+        find_move(game_state, text).execute(game_state)
+    return game_state
+
+
+def perft(game_state, depth):
+    "Number of leaf nodes depth plies below the current position, searched in place with execute/undo"
+    if depth == 0:
+        return 1
+    options = game_state.all_possible_moves()
+    if depth == 1:
+        return len(options)
+    nodes = 0
+    for move in options:
+        move.execute(game_state)
+        nodes += perft(game_state, depth - 1)
+        move.undo(game_state)
+    return nodes
+
+
+def divide(game_state, depth):
+    """Perft split by root move, for finding which move a wrong count comes from
+
+    Returns:
+        list: (move, leaf count) pairs in generation order
+    """
+    counts = []
+    for move in game_state.all_possible_moves():
+        move.execute(game_state)
+        counts.append((move, perft(game_state, depth - 1)))
+        move.undo(game_state)
+    return counts
+
+
+def check(max_depth=None, board_class=Board):
+    """Runs perft on every reference position and prints the results
+
+    Returns:
+        bool: True if every count matched
+    """
+    ok = True
+    for name, game, moves, expected in REFERENCE_POSITIONS:
+        game_state = play_moves(new_game_state(game, board_class), moves)
+        for depth, count in enumerate(expected, 1):
+            if max_depth and depth > max_depth:
+                break
+            start = time.perf_counter()
+            nodes = perft(game_state, depth)
+            elapsed = time.perf_counter() - start
+            status = "ok" if nodes == count else f"FAILED expected {count}"
+            ok = ok and nodes == count
+            print(f"{name:<22} depth {depth} {nodes:>10} {elapsed:>8.2f}s {status}")
+    return ok
+
+
+def bench(game, depth, board_class=Board):
+    """Times perft from the starting position
+
+    Returns:
+        tuple: (leaf nodes, seconds elapsed)
+    """
+    game_state = new_game_state(game, board_class)
+    start = time.perf_counter()
+    nodes = perft(game_state, depth)
+    return nodes, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    board_class = BitBoard if "bitboard" in sys.argv else Board
+    args = [a for a in sys.argv[2:] if a != "bitboard"]
+
+    if command == "check":
+        if not check(int(args[0]) if args else None, board_class):
+            sys.exit(1)
+    elif command == "divide":
+        game_state = play_moves(new_game_state(args[0], board_class), " ".join(args[2:]))
+        total = 0
+        for move, nodes in divide(game_state, int(args[1])):
+            print(f"{move._start}{move._end}: {nodes}")
+            total += nodes
+        print(f"total: {total}")
+    elif command == "bench":
+        nodes, elapsed = bench(args[0], int(args[1]), board_class)
+        print(f"{args[0]} {board_class.__name__} depth {args[1]}: {nodes} nodes {elapsed:.2f}s "
+              f"{nodes / elapsed:.0f} nodes/s")
+    else:
+        print(__doc__)
@@ -1,6 +1,18 @@
 
 class Piece:
-    "Abstract piece class"
+    """Abstract piece class
+
+    Only what differs between pieces of the same kind is kept on each piece. Data that is the same for
+    every piece of a class, such as its value, symbols and move directions, are class attributes.
+    """
+    __slots__ = ("_current_space", "_board", "_side")
+
+    # whether losing this piece loses the game, the board tracks where each side's royal piece is
+    royal = False
+    # material value in points
+    _val = 0
+    # side -> symbol the piece is printed as
+    _symbols = {}
 
     def __init__(self, side, board, space):
         self._current_space = space
@@ -13,7 +25,7 @@ class Piece:
         return self._side
 
     def __str__(self):
-        return self._symbol
+        return self._symbols[self._side]
 
     def move(self, space):
         self._current_space = space
@@ -22,9 +34,10 @@ class Piece:
         "Promote returns the current piece by default (doing nothing), but may be overridden for specific piece rules"
         return self
 
-    def enumerate_moves(self):
+    def enumerate_moves(self, captures_only=False, quiet_only=False):
         """Abstract method
-        Concrete implementations should return a list of valid Move objects
+        Concrete implementations should return a list of valid Move objects,
+        or only those that capture when captures_only is set, or only those that do not when quiet_only is set
         """
         raise NotImplementedError()
 
@@ -1,5 +1,8 @@
 class PieceFactory():
     "Interface for abstract piece factory"
 
+    # PieceSquareTables used by boards set up with this factory, None for material only
+    piece_square_tables = None
+
     def create_piece(self, board, space):
         raise NotImplementedError()
@@ -1,6 +1,13 @@
+import multiprocessing
+import pickle
 import random
-from constants import LOSS, WIN, BLACK, WHITE
-from copy import deepcopy
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from constants import LOSS, WIN, BLACK, WHITE, TT_SIZE_MB, MAX_DEPTH, QUIESCENCE_DEPTH
+from transposition import TranspositionTable, EXACT, LOWER, UPPER, encode_move, decode_move
+from move_ordering import MoveOrderer
+from evaluation import MATERIAL_SCALE
 
 class Player:
     "Abstract player class"
@@ -9,6 +16,7 @@ class Player:
         self.side = side
 
     def take_turn(self):
+        "Chooses a move for the player's side and executes it, returning the move so it can be recorded"
         raise NotImplementedError()
 
     @staticmethod
@@ -20,14 +28,27 @@ class Player:
             return RandomCompPlayer()
         elif player_type == "greedy":
             return GreedyCompPlayer()
-        elif len(player_type) >= len("minimax") and player_type[0:7] == "minimax":
-            if len(player_type) == len("minimax"):
-                return MiniMax(3)
-            try:
-                depth = int(player_type[7])
-                return MiniMax(depth)
-            except:
+        elif player_type[0:7] == "minimax":
+            # minimax[depth][t<seconds per move>][n<nodes per move>][p<processes>],
+            # e.g. minimax5, minimaxt2.5, minimax8n50000 or minimax6p8
+            match = re.fullmatch(r"minimax(\d*)(?:t(\d+(?:\.\d+)?))?(?:n(\d+))?(?:p(\d+))?", player_type)
+            if not match:
                 return None
+            depth, time_limit, node_limit, workers = match.groups()
+            time_limit = float(time_limit) if time_limit else None
+            node_limit = int(node_limit) if node_limit else None
+            if depth:
+                depth = int(depth)
+            elif time_limit or node_limit:
+                depth = MAX_DEPTH
+            else:
+                depth = 3
+            if workers:
+                # the parallel search only supports fixed depths
+                if time_limit or node_limit:
+                    return None
+                return ParallelMiniMax(depth, int(workers))
+            return MiniMax(depth, time_limit=time_limit, node_limit=node_limit)
         else:
             return None
 
@@ -46,14 +67,16 @@ class HumanPlayer(Player):
             if chosen_piece.side != self.side:
                 print("that is not your piece")
                 continue
-            options = chosen_piece.enumerate_moves()
-            if len(options) == 0 or options[0] not in game_state.all_possible_moves():
+            # only the piece's legal moves, which rules out moves like basic moves when a jump is available
+            options = [m for m in game_state.all_possible_moves() if m._start.piece is chosen_piece]
+            if len(options) == 0:
 
                 print("that piece cannot move")
                 continue
 
-            self._prompt_for_move(options).execute(game_state)
-            return
+            move = self._prompt_for_move(options)
+            move.execute(game_state)
+            return move
 
     def _prompt_for_move(self, options):
         while True:
@@ -76,6 +99,7 @@ class RandomCompPlayer(Player):
         m = random.choice(options)
         print(m)
         m.execute(game_state)
+        return m
 
 
 class GreedyCompPlayer(Player):
@@ -95,21 +119,101 @@ class GreedyCompPlayer(Player):
         selected_move = random.choice(potential_moves)
         print(selected_move)
         selected_move.execute(game_state)
+        return selected_move
+
+class SearchAborted(Exception):
+    "Raised inside MiniMax.doSearch when the time or node budget for a move runs out"
+
 
 class MiniMax(Player):
-    "Fixed-depth minimax search AI"
-    def __init__(self, depth, *args, **kwargs):
+    """Minimax search AI
+
+    Searches to a fixed depth, or with a time_limit (seconds) or node_limit per move searches
+    with iterative deepening up to that depth and plays the best move of the deepest completed iteration.
+    """
+    def __init__(self, depth, *args, tt_size_mb=TT_SIZE_MB, time_limit=None, node_limit=None,
+                 move_ordering=True, quiescence=True, **kwargs):
         super().__init__(*args, **kwargs)
         self._depth = depth
+        self._time_limit = time_limit
+        self._node_limit = node_limit
+        # whether leaves are resolved with a capture-only search instead of evaluated directly
+        self._quiescence = quiescence
+        # number of positions visited by the most recent search, and how many of those were quiescence nodes
+        self.nodes = 0
+        self.q_nodes = 0
+        # depth of the last iteration that finished in the most recent iterative deepening search
+        self.completed_depth = 0
+        # transposition table shared by all searches of this player, disabled when the size is 0
+        self.tt = TranspositionTable(tt_size_mb) if tt_size_mb else None
+        # killer and history heuristics shared by all searches of this player, or None to search in generation order
+        self.ordering = MoveOrderer() if move_ordering else None
+
+        # iterative deepening state
+        self._deadline = None
+        self._limits_active = False
+        self._best_move = None
     def take_turn(self, game_state):
         #print("Side of this turn:")
         #print(self.side)
-        best = self.doSearch(game_state, self._depth, [LOSS, None], [WIN, None])
+        self.nodes = 0
+        self.q_nodes = 0
+        if self.tt:
+            self.tt.new_search()
+        if self.ordering:
+            self.ordering.new_search()
+        if self._time_limit or self._node_limit:
+            best = self.iterative_search(game_state)
+        else:
+            best = self.doSearch(game_state, self._depth, [LOSS, None], [WIN, None])
         move = best[1]
         print(move)
         move.execute(game_state)
-    def doSearch(self, game_state, depth, least, most):
+        return move
+    def iterative_search(self, game_state):
+        """Searches to depth 1, 2, ... up to the player's depth until the time or node budget runs out
+
+        Each iteration searches the previous iteration's best move first.
+
+        Returns:
+            list: [score, move] from the deepest completed iteration
+        """
+        self._deadline = time.perf_counter() + self._time_limit if self._time_limit else None
+        self.completed_depth = 0
+        best = None
+        for depth in range(1, self._depth + 1):
+            # the first iteration always completes so that there is a move to play
+            self._limits_active = depth > 1
+            try:
+                result = self.doSearch(game_state, depth, [LOSS, None], [WIN, None])
+            except SearchAborted:
+                break
+            finally:
+                self._limits_active = False
+            best = result
+            self._best_move = result[1]
+            self.completed_depth = depth
+            if result[0] == WIN or result[0] == LOSS:
+                # the outcome is decided, deeper searches cannot change it
+                break
+        self._best_move = None
+        return best
+    def _out_of_budget(self):
+        if self._node_limit and self.nodes > self._node_limit:
+            return True
+        # reading the clock is comparatively slow so only do it every 64 nodes
+        return self._deadline is not None and self.nodes % 64 == 0 and time.perf_counter() > self._deadline
+    def doSearch(self, game_state, depth, least, most, ply=0):
+        """Alpha-beta search run in place on a single game state
+
+        Each child is reached with Move.execute and left with Move.undo, so the
+        game state is back in its original position when this returns.
+        ply is the distance from the root and is used for move ordering.
+        """
         #print("Searching...")
+        self.nodes += 1
+        if self._limits_active and self._out_of_budget():
+            raise SearchAborted()
         if game_state.check_loss():
             if game_state._current_side == self.side:
                 return [LOSS, None]
@@ -117,62 +221,309 @@ class MiniMax(Player):
         elif game_state.check_draw():
             return [0, None]
         elif depth == 0:
+            if self._quiescence:
+                return self.quiesce(game_state, least, most, ply)
             return [game_state.evaluate(self.side), None]
 
+        hash_move = None
+        if self.tt:
+            key = game_state.zobrist_key
+            entry = self.tt.probe(key)
+            if entry:
+                tt_depth, score, bound, code = entry
+                move = decode_move(game_state, code)
+                if code < 0 or move is not None:
+                    # bounds are compared strictly so that ties are always searched and can be broken randomly
+                    if tt_depth >= depth and (bound == EXACT or
+                                              (bound == LOWER and score > most[0]) or
+                                              (bound == UPPER and score < least[0])):
+                        return [score, move]
+                    # search the stored best move first
+                    hash_move = move
+        if ply == 0 and self._best_move is not None:
+            # search the previous iteration's best move first
+            hash_move = self._best_move
+        if self.ordering:
+            # moves are generated stage by stage, so a cutoff by the hash move or a capture skips the quiet moves
+            moves = self.ordering.staged_moves(game_state, ply, hash_move)
+        elif hash_move is not None:
+            moves = [hash_move] + [m for m in game_state.all_possible_moves() if not m == hash_move]
+        else:
+            moves = game_state.all_possible_moves()
+
         if game_state._current_side == self.side:
             v = [least[0], None]
-            options = game_state.all_possible_moves()
-            #print(len(options))
-            if len(options) > 0:
-                v[1] = options[0]
             move_choices = [v]
-            for i in range(len(options)):
-                gs = deepcopy(game_state)
-                move = (gs.all_possible_moves())[i]
-                #print(len(gs.all_possible_moves()))
-                move.execute(gs)
-                result = self.doSearch(gs, depth - 1, v, most)
+            for move_number, move in enumerate(moves):
+                if move_number == 0:
+                    v[1] = move
+                move.execute(game_state)
+                try:
+                    if ply == 0:
+                        # below the bound scores are clamped to it, so search the root's children one point
+                        # below it so that a score equal to the best so far is exact and can be a real tie
+                        result = self.doSearch(game_state, depth - 1, [v[0] - 1, None], most, ply + 1)
+                    else:
+                        result = self.doSearch(game_state, depth - 1, v, most, ply + 1)
+                finally:
+                    # also undo when the search is aborted so the game state is left as it was found
+                    move.undo(game_state)
                 if result[0] > v[0]:
                     v[0] = result[0]
-                    v[1] = options[i]
+                    v[1] = move
                     move_choices = [v]
                 elif result[0] == v[0]:
-                    temp = [result[0], options[i]]
+                    temp = [result[0], move]
                     move_choices.append(temp)
-                if v[0] > most[0]:
+                # a tie with the bound can also cut off, except at the root's children where the root
+                # needs exact values to break ties randomly
+                if v[0] > most[0] or (v[0] == most[0] and ply > 1):
                     #print("")
                     #return [LOSS, None]
+                    if self.ordering:
+                        self.ordering.record_cutoff(move, ply, depth, move_number)
+                    self._store(game_state, depth, v, LOWER)
                     return v
             selected = random.choice(move_choices)
             #print("")
+            self._store(game_state, depth, selected, UPPER if selected[0] <= least[0] else EXACT)
             return selected
             #return v
             
         else:
             v = [most[0], None]
-            options = game_state.all_possible_moves()
-            #print(len(options))
-            if len(options) > 0:
-                v[1] = options[0]
             move_choices = [v]
-            for i in range(len(options)):
-                gs = deepcopy(game_state)
-                move = (gs.all_possible_moves())[i]
-                move.execute(gs)
-                result = self.doSearch(gs, depth - 1, least, v)
+            for move_number, move in enumerate(moves):
+                if move_number == 0:
+                    v[1] = move
+                move.execute(game_state)
+                try:
+                    result = self.doSearch(game_state, depth - 1, least, v, ply + 1)
+                finally:
+                    move.undo(game_state)
                 if result[0] < v[0]:
                     v[0] = result[0]
-                    v[1] = options[i]
+                    v[1] = move
                     move_choices = [v]
                 elif result[0] == v[0]:
-                    temp = [result[0], options[i]]
+                    temp = [result[0], move]
                     move_choices.append(temp)
-                if v[0] < least[0]:
+                if v[0] < least[0] or (v[0] == least[0] and ply > 1):
                     #print("Returning least")
                     #return [WIN, None]
+                    if self.ordering:
+                        self.ordering.record_cutoff(move, ply, depth, move_number)
+                    self._store(game_state, depth, v, UPPER)
                     return v
             selected = random.choice(move_choices)
+            self._store(game_state, depth, selected, LOWER if selected[0] >= most[0] else EXACT)
             return selected
             #return v
         
         return [LOSS, None]
+
+    def quiesce(self, game_state, least, most, ply, q_ply=0):
+        """Capture-only search used in place of evaluating a leaf, so that leaves are not scored mid-exchange
+
+        The side to move may stand pat on the evaluation instead of capturing, except when captures are
+        mandatory (checkers jumps) or it is in check, in which case every move must be played out.
+        Captures that could not bring the score back to the bound even if nothing is recaptured are skipped,
+        and below QUIESCENCE_DEPTH plies the position is evaluated as it stands.
+        The game state must already have been checked for a loss.
+        """
+        self.q_nodes += 1
+        if q_ply >= QUIESCENCE_DEPTH:
+            return [game_state.evaluate(self.side), None]
+        maximizing = game_state._current_side == self.side
+        # only captures are generated unless the side is in check
+        captures = game_state.all_possible_moves() if game_state.in_check() else game_state.capture_moves()
+        if len(captures) == 0 and not game_state.has_any_legal_move():
+            # no moves is a draw, as in GameState.check_draw
+            return [0, None]
+        if captures.has_jump or game_state.in_check():
+            # mandatory jumps or check evasions, standing pat is not an option
+            v = [least[0] if maximizing else most[0], None]
+        else:
+            stand_pat = game_state.evaluate(self.side)
+            # same tie rule as doSearch
+            if maximizing and (stand_pat > most[0] or (stand_pat == most[0] and ply > 1)):
+                return [stand_pat, None]
+            if not maximizing and (stand_pat < least[0] or (stand_pat == least[0] and ply > 1)):
+                return [stand_pat, None]
+            if maximizing:
+                v = [max(least[0], stand_pat), None]
+            else:
+                v = [min(most[0], stand_pat), None]
+            # delta pruning with a one piece margin for piece-square gains,
+            # promotions can gain more than the captured material so they are always searched
+            if maximizing:
+                captures = [m for m in captures if
+                            (m._promotion or stand_pat + (m.capture_value() + 1) * MATERIAL_SCALE > v[0])]
+            else:
+                captures = [m for m in captures if
+                            (m._promotion or stand_pat - (m.capture_value() + 1) * MATERIAL_SCALE < v[0])]
+            # captures of a defended piece worth less than the capturing piece lose material
+            side = game_state._current_side
+            captures = [m for m in captures if m._start.piece._val <= m.capture_value() or
+                        not game_state.is_attacked(m._end, not side, m._start)]
+
+        order = self.ordering.order(captures, ply) if self.ordering else range(len(captures))
+        for i in order:
+            move = captures[i]
+            move.execute(game_state)
+            try:
+                self.nodes += 1
+                if game_state.check_loss():
+                    result = [LOSS if game_state._current_side == self.side else WIN, None]
+                elif maximizing:
+                    result = self.quiesce(game_state, v, most, ply + 1, q_ply + 1)
+                else:
+                    result = self.quiesce(game_state, least, v, ply + 1, q_ply + 1)
+            finally:
+                move.undo(game_state)
+            if maximizing and result[0] > v[0]:
+                v = [result[0], move]
+                if v[0] > most[0] or (v[0] == most[0] and ply > 1):
+                    return v
+            elif not maximizing and result[0] < v[0]:
+                v = [result[0], move]
+                if v[0] < least[0] or (v[0] == least[0] and ply > 1):
+                    return v
+        return v
+
+    def _store(self, game_state, depth, result, bound):
+        "Records a search result in the transposition table along with its move"
+        if self.tt:
+            self.tt.store(game_state.zobrist_key, depth, result[0], bound, encode_move(game_state.board, result[1]))
+
+
+class SharedBound:
+    """
+    Stands in for the [score, move] bound lists of MiniMax.doSearch with a score read from shared memory,
+    so that a worker sees the alpha found by other workers as soon as it improves.
+    Like the serial search's bound for the root's children it reads one point below the alpha,
+    so a root move scoring the same as the best is searched exactly.
+    """
+
+    def __init__(self, value):
+        self._value = value
+
+    def __getitem__(self, i):
+        return self._value.value - 1
+
+
+# per process state of ParallelMiniMax workers
+_worker_alpha = None
+_worker_players = {}
+
+
+def _init_worker(alpha):
+    global _worker_alpha
+    _worker_alpha = alpha
+
+
+def _search_root_move(state, index, depth, side, tt_size_mb, search_id):
+    """Searches one root move in a worker process
+
+    Args:
+        state (bytes): pickled game state at the root
+        index (int): index of the move in the root position's move list
+        depth (int): depth of the whole search including the root move
+        side (bool): side the search is maximising for
+        tt_size_mb (float): transposition table size for this worker's player
+        search_id (int): identifies the root search so the worker can age its tables when a new one starts
+
+    Returns:
+        tuple: (index, score, nodes searched)
+    """
+    game_state = pickle.loads(state)
+    move = game_state.all_possible_moves()[index]
+
+    # each worker keeps a player per side so its transposition table, killers and history survive between tasks,
+    # which works across the tasks' unpickled boards since they are keyed by zobrist keys and square coordinates
+    player = _worker_players.get(side)
+    if player is None:
+        player = MiniMax(depth, tt_size_mb=tt_size_mb)
+        player.side = side
+        player.search_id = None
+        _worker_players[side] = player
+    if player.search_id != search_id:
+        player.search_id = search_id
+        if player.tt:
+            player.tt.new_search()
+        if player.ordering:
+            player.ordering.new_search()
+    player.nodes = 0
+
+    move.execute(game_state)
+    result = player.doSearch(game_state, depth - 1, SharedBound(_worker_alpha), [WIN, None], 1)
+    with _worker_alpha.get_lock():
+        if result[0] > _worker_alpha.value:
+            _worker_alpha.value = result[0]
+    return index, result[0], player.nodes
+
+
+class ParallelMiniMax(MiniMax):
+    """Fixed-depth MiniMax that splits the root moves across a pool of worker processes
+
+    Workers share the root's alpha through shared memory. A root move searched with a stale alpha
+    still returns its exact score and any move cut off by a better alpha scores strictly below the best,
+    so the best score and the set of tied best moves are the same as the serial search.
+    """
+
+    def __init__(self, depth, workers, *args, tt_size_mb=TT_SIZE_MB, **kwargs):
+        # the root is only ordered here, the workers keep their own transposition tables
+        super().__init__(depth, *args, tt_size_mb=0, **kwargs)
+        self._workers = workers
+        self._worker_tt_size_mb = tt_size_mb
+        self._pool = None
+        self._alpha = None
+        self._search_id = 0
+
+    def take_turn(self, game_state):
+        self.nodes = 0
+        if self.ordering:
+            self.ordering.new_search()
+        best = self.parallel_search(game_state)
+        move = best[1]
+        print(move)
+        move.execute(game_state)
+        return move
+
+    def parallel_search(self, game_state):
+        """Searches every root move in the worker pool
+
+        Returns:
+            list: [score, move] with ties between the best moves broken randomly
+        """
+        options = game_state.all_possible_moves()
+        if self._depth < 2 or len(options) < 2:
+            # nothing worth splitting
+            return self.doSearch(game_state, self._depth, [LOSS, None], [WIN, None])
+
+        if self._pool is None:
+            self._alpha = multiprocessing.Value("i", LOSS)
+            self._pool = ProcessPoolExecutor(self._workers, initializer=_init_worker, initargs=(self._alpha,))
+        self._alpha.value = LOSS
+        self._search_id += 1
+
+        state = pickle.dumps(game_state)
+        # submitting the most promising moves first raises the shared alpha early
+        order = self.ordering.order(options, 0) if self.ordering else range(len(options))
+        futures = [self._pool.submit(_search_root_move, state, i, self._depth, self.side,
+                                     self._worker_tt_size_mb, self._search_id) for i in order]
+        self.nodes = 1
+        scores = {}
+        for future in futures:
+            index, score, nodes = future.result()
+            scores[index] = score
+            self.nodes += nodes
+
+        best = max(scores.values())
+        return [best, random.choice([options[i] for i in order if scores[i] == best])]
+
+    def close(self):
+        "Shuts down the worker processes"
+        if self._pool:
+            self._pool.shutdown()
+            self._pool = None
@@ -1,6 +1,5 @@
 import random
 from constants import LOSS, WIN, BLACK, WHITE
-from copy import deepcopy
 import tkinter
 import tkinter.font as font
 from tkinter import ttk 
@@ -24,6 +23,7 @@ class Player:
         self.side = side
 
     def take_turn(self):
+        "Chooses a move for the player's side and executes it, returning the move so it can be recorded"
         raise NotImplementedError()
 
     @staticmethod
@@ -69,8 +69,8 @@ class HumanPlayer(Player):
         if chosen_piece.side != self.side:
             ttk.Label(menu.message_frame, text = "That is not your piece").pack()
             return
-        options = chosen_piece.enumerate_moves()
-        if len(options) == 0 or options[0] not in game_state.all_possible_moves():
+        options = [m for m in game_state.all_possible_moves() if m._start.piece is chosen_piece]
+        if len(options) == 0:
             ttk.Label(menu.message_frame, text = "That piece cannot move").pack()
             return
 
@@ -88,14 +88,16 @@ class HumanPlayer(Player):
             if chosen_piece.side != self.side:
                 print("that is not your piece")
                 continue
-            options = chosen_piece.enumerate_moves()
-            if len(options) == 0 or options[0] not in game_state.all_possible_moves():
+            # only the piece's legal moves, which rules out moves like basic moves when a jump is available
+            options = [m for m in game_state.all_possible_moves() if m._start.piece is chosen_piece]
+            if len(options) == 0:
 
                 print("that piece cannot move")
                 continue
 
-            self._prompt_for_move(options).execute(game_state)
-            return
+            move = self._prompt_for_move(options)
+            move.execute(game_state)
+            return move
 
 
     def _highlight_moves(self, options, menu):
@@ -147,6 +149,7 @@ class RandomCompPlayer(Player):
         options = game_state.all_possible_moves()
         m = random.choice(options)
         m.execute(game_state)
+        return m
 
 
 class GreedyCompPlayer(Player):
@@ -166,6 +169,7 @@ class GreedyCompPlayer(Player):
         selected_move = random.choice(potential_moves)
         # print(selected_move)
         selected_move.execute(game_state)
+        return selected_move
 
 class MiniMax(Player):
     "Fixed-depth minimax search AI"
@@ -177,6 +181,7 @@ class MiniMax(Player):
         move = best[1]
         # print(move)
         move.execute(game_state)
+        return move
     def doSearch(self, game_state, depth):
         if game_state.check_loss():
             if game_state._current_side == self.side:
@@ -191,10 +196,9 @@ class MiniMax(Player):
             v = [LOSS, None]
             options = game_state.all_possible_moves()
             for i in range(len(options)):
-                gs = deepcopy(game_state)
-                move = (gs.all_possible_moves())[i]
-                move.execute(gs)
-                result = self.doSearch(gs, depth - 1)
+                options[i].execute(game_state)
+                result = self.doSearch(game_state, depth - 1)
+                options[i].undo(game_state)
                 if result[0] > v[0]:
                     v[0] = result[0]
                     v[1] = options[i]
@@ -204,10 +208,9 @@ class MiniMax(Player):
             v = [WIN, None]
             options = game_state.all_possible_moves()
             for i in range(len(options)):
-                gs = deepcopy(game_state)
-                move = (gs.all_possible_moves())[i]
-                move.execute(gs)
-                result = self.doSearch(gs, depth - 1)
+                options[i].execute(game_state)
+                result = self.doSearch(game_state, depth - 1)
+                options[i].undo(game_state)
                 if result[0] < v[0]:
                     v[0] = result[0]
                     v[1] = options[i]
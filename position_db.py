@@ -0,0 +1,251 @@
+"""
+Database of the positions reached in an archive of games, for "seen this position" lookups
+
+Every position of every game is counted under its zobrist key, together with the move played
+from it and the game's result. The database file is a header followed by fixed-width records
+sorted by key and move, which are searched with a binary search through mmap without loading
+the file.
+
+Record: key (u64), move (u32), times reached (u32), white wins (u32), black wins (u32), draws (u32)
+
+All numbers are little endian. The move is the game archive code of the move played, or NO_MOVE
+for positions the game ended in. Positions reached more than once in a game count every time.
+
+usage: python position_db.py archive_file db_file [-w workers] [-p max plies]
+"""
+import argparse
+import heapq
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from game_archive import FILE_HEADER, GameArchive, decode_move
+
+MAGIC = b"GPDB"
+VERSION = 1
+RECORD = struct.Struct("<QIIIII")
+KEY = struct.Struct("<Q")
+NO_MOVE = 0xFFFFFFFF
+
+# games each worker indexes before writing out a sorted run
+CHUNK_GAMES = 1000
+# records read or written at a time while merging runs
+BLOCK_RECORDS = 4096
+
+# result -> position of its counter among times reached, white wins, black wins and draws
+RESULT_COUNTERS = {"1-0": 1, "0-1": 2, "1/2-1/2": 3}
+
+
+def _index_games(archive_path, first, last, run_path, max_plies=None):
+    """Counts the positions of games first to last - 1 of an archive and writes them to a sorted run file
+
+    Returns:
+        int: number of positions counted
+    """
+    counts = {}
+    positions = 0
+    with GameArchive(archive_path) as archive:
+        game_state = None
+        game_type = None
+        for n in range(first, last):
+            game = archive[n]
+            if game_state is None or game.game != game_type:
+                game_state = game.start()
+                game_type = game.game
+            else:
+                game.start(game_state=game_state)
+            counter = RESULT_COUNTERS.get(game.result)
+            codes = game.codes
+            if max_plies is None or len(codes) <= max_plies:
+                # the end of the game after the last move
+                codes.append(NO_MOVE)
+            else:
+                codes = codes[:max_plies]
+            for code in codes:
+                entry = counts.get((game_state.zobrist_key, code))
+                if entry is None:
+                    entry = counts[(game_state.zobrist_key, code)] = [0, 0, 0, 0]
+                entry[0] += 1
+                if counter:
+                    entry[counter] += 1
+                positions += 1
+                if code != NO_MOVE:
+                    decode_move(game_state, code).execute(game_state)
+    _write_records(run_path, (key + tuple(entry) for key, entry in sorted(counts.items())))
+    return positions
+
+
+def _index_games_args(args):
+    return _index_games(*args)
+
+
+def _write_records(path, records):
+    with open(path, "wb") as output:
+        output.write(FILE_HEADER.pack(MAGIC, VERSION))
+        block = bytearray()
+        for record in records:
+            block += RECORD.pack(*record)
+            if len(block) >= BLOCK_RECORDS * RECORD.size:
+                output.write(block)
+                block = bytearray()
+        output.write(block)
+
+
+def _read_records(path):
+    "Yields the records of a run or database file in order, reading a block at a time"
+    with open(path, "rb") as data:
+        data.seek(FILE_HEADER.size)
+        while True:
+            block = data.read(BLOCK_RECORDS * RECORD.size)
+            if not block:
+                return
+            yield from RECORD.iter_unpack(block)
+
+
+def _merge(runs):
+    "Merges sorted runs of records, adding up the counters of records with the same key and move"
+    merged = None
+    for record in heapq.merge(*(_read_records(run) for run in runs)):
+        if merged is not None and record[:2] == merged[:2]:
+            merged = merged[:2] + tuple(a + b for a, b in zip(merged[2:], record[2:]))
+            continue
+        if merged is not None:
+            yield merged
+        merged = record
+    if merged is not None:
+        yield merged
+
+
+def build(archive_path, db_path, workers=None, max_plies=None, chunk_games=CHUNK_GAMES):
+    """Indexes the positions of every game in an archive into a new database file
+
+    The games are split into chunks that a pool of processes count into sorted run files,
+    which are then merged into the database, so memory use depends on the chunk size rather
+    than on the size of the archive.
+
+    Args:
+        archive_path (str): game archive to index
+        db_path (str): database file to write, replacing any existing file
+        workers (int, optional): processes, defaults to the cpu count
+        max_plies (int, optional): only index the positions of each game's first max_plies moves, such as
+            for an opening book. Defaults to None for every position.
+        chunk_games (int, optional): games per run. Defaults to CHUNK_GAMES.
+
+    Returns:
+        int: number of positions indexed
+    """
+    with GameArchive(archive_path) as archive:
+        games = len(archive)
+    run_dir = tempfile.mkdtemp(prefix="runs", dir=os.path.dirname(os.path.abspath(db_path)))
+    tasks = [(archive_path, first, min(first + chunk_games, games), os.path.join(run_dir, f"{first}.run"), max_plies)
+             for first in range(0, games, chunk_games)]
+    try:
+        with ProcessPoolExecutor(workers) as pool:
+            positions = sum(pool.map(_index_games_args, tasks))
+        _write_records(db_path, _merge([task[3] for task in tasks]))
+    finally:
+        for task in tasks:
+            if os.path.exists(task[3]):
+                os.remove(task[3])
+        os.rmdir(run_dir)
+    return positions
+
+
+class PositionDB:
+    """
+    Lookups in a database file written by build, through mmap
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as data:
+            self._data = mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._data) < FILE_HEADER.size or FILE_HEADER.unpack_from(self._data) != (MAGIC, VERSION):
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} position database")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._data.close()
+
+    def __len__(self):
+        "Number of records, one for each move played from each position"
+        return (len(self._data) - FILE_HEADER.size) // RECORD.size
+
+    def _key_at(self, i):
+        return KEY.unpack_from(self._data, FILE_HEADER.size + i * RECORD.size)[0]
+
+    def lookup(self, key):
+        """Records of a position
+
+        Args:
+            key (int): zobrist key of the position, including the side to move
+
+        Returns:
+            list: (move code, times reached, white wins, black wins, draws) for each move played from the position
+        """
+        low, high = 0, len(self)
+        # first record whose key is not less than key
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        records = []
+        while low < len(self) and self._key_at(low) == key:
+            records.append(RECORD.unpack_from(self._data, FILE_HEADER.size + low * RECORD.size)[1:])
+            low += 1
+        return records
+
+    def query(self, game_state):
+        """How often the game state's position was reached, with what results, and the moves played from it
+
+        Returns:
+            dict: "count", "white_wins", "black_wins" and "draws" for the position, and "moves", a list of dicts
+                with the same counters and the "move" of the game state it is for, most played first.
+                Moves that the game state does not have, which only happens when two positions share a key, are left out.
+        """
+        totals = {"count": 0, "white_wins": 0, "black_wins": 0, "draws": 0}
+        moves = []
+        for code, *counts in self.lookup(game_state.zobrist_key):
+            stats = dict(zip(totals, counts))
+            for name, value in stats.items():
+                totals[name] += value
+            if code == NO_MOVE:
+                continue
+            move = decode_move(game_state, code)
+            if move is not None:
+                stats["move"] = move
+                moves.append(stats)
+        moves.sort(key=lambda stats: -stats["count"])
+        totals["moves"] = moves
+        return totals
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Builds a position database from a game archive")
+    parser.add_argument("archive")
+    parser.add_argument("db")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="processes, defaults to the cpu count")
+    parser.add_argument("-p", "--plies", type=int, default=None, help="only index each game's first plies")
+    args = parser.parse_args(argv[1:])
+
+    start = time.perf_counter()
+    positions = build(args.archive, args.db, args.workers, args.plies)
+    elapsed = time.perf_counter() - start
+    with PositionDB(args.db) as db:
+        records = len(db)
+    print(f"{positions} positions in {elapsed:.2f}s, {positions / elapsed:.0f} positions/s, {records} records")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,212 @@
+"""
+Headless engine-vs-engine tournaments
+
+Plays games between any Player.create_player types (except human) across a pool of processes
+and writes one CSV line per game for Elo estimation. Every game gets its own seed so any single
+game can be replayed exactly with play_game. The games themselves can also be recorded, in PGN
+for chess or PDN for checkers.
+
+usage: python tournament.py [chess|checkers] player1 player2 [player3...] [-n games] [-w workers] [-s seed] [-o file]
+                            [-r record file]
+"""
+import argparse
+import contextlib
+import copy
+import csv
+import functools
+import io
+import itertools
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from constants import CHECKERS, CHESS, WHITE, BLACK
+from players import Player
+from perft import new_game_state
+from chess import pgn
+from checkers import pdn
+
+# games still running after this many plies are scored as draws
+MAX_PLIES = 1000
+
+RESULT_FIELDS = ["game_id", "game", "white", "black", "seed", "result", "plies", "white_ms_per_move",
+                 "black_ms_per_move"]
+
+
+def play_game(game, white_type, black_type, seed, game_id=0, max_plies=MAX_PLIES, record=False):
+    """Plays one game without any output
+
+    Args:
+        game (string): CHESS or CHECKERS
+        white_type (string): player type for white as accepted by Player.create_player
+        black_type (string): player type for black
+        seed (int): seed for the random module, which all computer players draw from
+        game_id (int, optional): id copied into the result. Defaults to 0.
+        max_plies (int, optional): plies after which the game is scored as a draw. Defaults to MAX_PLIES.
+        record (bool, optional): also return the game in PGN for chess or PDN for checkers. Defaults to False.
+
+    Returns:
+        dict: one row of results with the keys in RESULT_FIELDS, result being "1-0", "0-1" or "1/2-1/2",
+            and the text of the game under "record" if it was asked for
+    """
+    random.seed(seed)
+    game_state = new_game_state(game)
+    start_state = copy.deepcopy(game_state) if record else None
+    played = []
+    players = {WHITE: Player.create_player(white_type), BLACK: Player.create_player(black_type)}
+    players[WHITE].side = WHITE
+    players[BLACK].side = BLACK
+    thinking = {WHITE: 0.0, BLACK: 0.0}
+    moves = {WHITE: 0, BLACK: 0}
+
+    result = "1/2-1/2"
+    plies = 0
+    # players print their moves, which is just noise here
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        while plies < max_plies:
+            side = game_state.current_side
+            if game_state.check_loss():
+                result = "0-1" if side == WHITE else "1-0"
+                break
+            if game_state.check_draw():
+                break
+            start = time.perf_counter()
+            move = players[side].take_turn(game_state)
+            thinking[side] += time.perf_counter() - start
+            moves[side] += 1
+            plies += 1
+            if record:
+                played.append(move)
+            # keep the buffer from growing over long games
+            output.seek(0)
+            output.truncate()
+
+    for player in players.values():
+        if hasattr(player, "close"):
+            player.close()
+
+    row = {
+        "game_id": game_id,
+        "game": game,
+        "white": white_type,
+        "black": black_type,
+        "seed": seed,
+        "result": result,
+        "plies": plies,
+        "white_ms_per_move": round(1000 * thinking[WHITE] / max(moves[WHITE], 1), 2),
+        "black_ms_per_move": round(1000 * thinking[BLACK] / max(moves[BLACK], 1), 2),
+    }
+    if record:
+        text = io.StringIO()
+        tags = {"Event": "Tournament", "Round": game_id + 1, "White": white_type, "Black": black_type, "Seed": seed}
+        write_game = pgn.write_game if game == CHESS else pdn.write_game
+        write_game(text, start_state, played, tags, result)
+        row["record"] = text.getvalue()
+    return row
+
+
+def _play_game_args(args, record=False):
+    return play_game(*args, record=record)
+
+
+def schedule(game, player_types, games, seed):
+    """Round-robin pairings with colours alternating, cycled until there are the requested number of games
+
+    Returns:
+        list: (game, white, black, seed, game_id) tuples
+    """
+    pairings = []
+    for a, b in itertools.combinations(player_types, 2):
+        pairings.append((a, b))
+        pairings.append((b, a))
+    rng = random.Random(seed)
+    return [(game, white, black, rng.getrandbits(32), game_id)
+            for game_id, (white, black) in zip(range(games), itertools.cycle(pairings))]
+
+
+def run_tournament(game, player_types, games, workers=None, seed=0, output=None, records=None):
+    """Plays the games across a process pool, streaming results to a CSV file as they finish
+
+    Args:
+        output (file, optional): open text file for the CSV results. Defaults to None for no file.
+        records (file, optional): open text file the games are written to, in PGN for chess or PDN for checkers.
+            Defaults to None for no file.
+
+    Returns:
+        list: result rows in the order the games were scheduled
+    """
+    writer = None
+    if output:
+        writer = csv.DictWriter(output, RESULT_FIELDS)
+        writer.writeheader()
+    results = []
+    play = functools.partial(_play_game_args, record=records is not None)
+    with ProcessPoolExecutor(workers) as pool:
+        for row in pool.map(play, schedule(game, player_types, games, seed), chunksize=4):
+            if records:
+                records.write(row.pop("record"))
+            results.append(row)
+            if writer:
+                writer.writerow(row)
+    return results
+
+
+def summarize(results):
+    """Win/draw/loss counts per player with an Elo difference estimated from the score against all opponents
+
+    Returns:
+        dict: player type -> {"wins", "draws", "losses", "score", "elo"}
+    """
+    table = {}
+    for row in results:
+        for player, colour in ((row["white"], "1-0"), (row["black"], "0-1")):
+            entry = table.setdefault(player, {"wins": 0, "draws": 0, "losses": 0})
+            if row["result"] == colour:
+                entry["wins"] += 1
+            elif row["result"] == "1/2-1/2":
+                entry["draws"] += 1
+            else:
+                entry["losses"] += 1
+    for entry in table.values():
+        played = entry["wins"] + entry["draws"] + entry["losses"]
+        entry["score"] = (entry["wins"] + entry["draws"] / 2) / played
+        # clamp so that a perfect score gives a large but finite rating
+        score = min(max(entry["score"], 0.001), 0.999)
+        entry["elo"] = round(-400 * math.log10(1 / score - 1))
+    return table
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Headless engine-vs-engine tournaments")
+    parser.add_argument("game", choices=[CHESS, CHECKERS])
+    parser.add_argument("players", nargs="+", help="player types such as random, greedy, minimax3")
+    parser.add_argument("-n", "--games", type=int, default=100)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="processes, defaults to the cpu count")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default=None, help="CSV file for per-game results")
+    parser.add_argument("-r", "--record", default=None, help="file for the games, in PGN for chess or PDN for checkers")
+    args = parser.parse_args(argv[1:])
+
+    if len(args.players) < 2:
+        parser.error("at least two players are needed")
+    for player_type in args.players:
+        if player_type == "human" or not Player.create_player(player_type):
+            parser.error(f"{player_type} is not a computer player type")
+
+    start = time.perf_counter()
+    with contextlib.ExitStack() as files:
+        output = files.enter_context(open(args.output, "w", newline="")) if args.output else None
+        records = files.enter_context(open(args.record, "w")) if args.record else None
+        results = run_tournament(args.game, args.players, args.games, args.workers, args.seed, output, records)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(results)} games in {elapsed:.2f}s")
+    for player, entry in sorted(summarize(results).items(), key=lambda item: -item[1]["score"]):
+        print(f"{player:<16} +{entry['wins']} ={entry['draws']} -{entry['losses']} "
+              f"score {entry['score']:.3f} elo {entry['elo']:+d}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
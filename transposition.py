@@ -0,0 +1,137 @@
+from array import array
+
+# bound types stored with each score
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# bytes used by one entry across the parallel arrays: key(8) + score(4) + move(2) + depth(1) + bound(1)
+ENTRY_BYTES = 16
+# each bucket holds a depth-preferred slot followed by an always-replace slot
+BUCKET_SIZE = 2
+
+
+def encode_move(board, move):
+    """Packs a move's start and end squares into the int stored as an entry's move, or -1 for no move
+
+    The code fits the table's 16 bit move field on boards of up to 13x13.
+    """
+    if move is None:
+        return -1
+    squares = board.size * board.size
+    return board.square(move._start) * squares + board.square(move._end)
+
+
+def decode_move(game_state, code):
+    """Finds the move of the current position that encode_move packed into code
+
+    Returns:
+        Move: the move, or None if code is -1 or the position has no such move, which means the entry came from another position
+    """
+    if code < 0:
+        return None
+    board = game_state.board
+    squares = board.size * board.size
+    start, end = divmod(code, squares)
+    return game_state.find_move(board.space_at(start), board.space_at(end))
+
+
+class TranspositionTable:
+    """
+    Fixed-size table of search results keyed by zobrist key.
+
+    Entries are stored in parallel arrays rather than a dict so memory use is
+    fixed up front. A key maps to a bucket of two slots: the first keeps the
+    deepest result seen (or any result from a previous search), the second is
+    overwritten by whatever does not fit in the first.
+    """
+
+    def __init__(self, size_mb):
+        """
+        Args:
+            size_mb (float): memory budget in megabytes, rounded down to a power of two number of buckets
+        """
+        buckets = 1
+        while buckets * 2 * BUCKET_SIZE * ENTRY_BYTES <= size_mb * 1024 * 1024:
+            buckets *= 2
+        self._mask = buckets - 1
+        slots = buckets * BUCKET_SIZE
+        self._keys = array("Q", bytes(8 * slots))
+        self._scores = array("i", bytes(4 * slots))
+        self._moves = array("h", bytes(2 * slots))
+        self._depths = array("b", bytes(slots))
+        self._bounds = array("b", bytes(slots))
+        self._ages = array("B", bytes(slots))
+        self._age = 1
+
+        # counters for sizing the table
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    @property
+    def size(self):
+        "Number of entries the table can hold"
+        return len(self._keys)
+
+    def new_search(self):
+        "Marks existing entries as stale so the depth-preferred slots can be reclaimed by the next search"
+        self._age = self._age % 255 + 1
+
+    def clear(self):
+        slots = len(self._keys)
+        self._keys = array("Q", bytes(8 * slots))
+        self._ages = array("B", bytes(slots))
+        self.hits = self.misses = self.collisions = self.stores = 0
+
+    def probe(self, key):
+        """Looks up the entry for a zobrist key
+
+        Returns:
+            tuple: (depth, score, bound, move code) or None if the key is not stored
+        """
+        slot = (key & self._mask) * BUCKET_SIZE
+        for i in (slot, slot + 1):
+            if self._keys[i] == key and self._ages[i]:
+                self.hits += 1
+                return self._depths[i], self._scores[i], self._bounds[i], self._moves[i]
+        self.misses += 1
+        if self._ages[slot] or self._ages[slot + 1]:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, score, bound, move=-1):
+        """Saves a search result, replacing an older entry according to the bucket policy
+
+        Args:
+            key (int): zobrist key of the position
+            depth (int): remaining depth the score was searched to
+            score (int): score of the position
+            bound (int): EXACT, LOWER or UPPER
+            move (int, optional): best move packed by encode_move, or -1 if unknown
+        """
+        slot = (key & self._mask) * BUCKET_SIZE
+        if self._keys[slot + 1] == key:
+            i = slot + 1
+        elif self._keys[slot] == key or self._ages[slot] != self._age or depth >= self._depths[slot]:
+            i = slot
+        else:
+            i = slot + 1
+        self._keys[i] = key
+        self._depths[i] = depth
+        self._scores[i] = score
+        self._bounds[i] = bound
+        self._moves[i] = move
+        self._ages[i] = self._age
+        self.stores += 1
+
+    def stats(self):
+        "Returns the counters as a dict"
+        return {
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+        }
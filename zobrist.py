@@ -0,0 +1,35 @@
+"""
+Zobrist keys for identifying board positions with a single 64-bit integer
+
+A position's key is the XOR of one random key per (piece type, side, square)
+plus SIDE_KEY when black is to move. Keys are derived from a hash of their
+inputs rather than a random generator so they are the same in every process
+and every run, which lets keys be stored on disk and compared later.
+"""
+import hashlib
+
+from constants import BLACK
+
+_piece_keys = {}
+
+
+def _derive_key(label):
+    return int.from_bytes(hashlib.blake2b(label.encode(), digest_size=8).digest(), "little")
+
+
+SIDE_KEY = _derive_key("side:black")
+
+
+def piece_key(piece, space):
+    "Returns the key for the given piece standing on the given space"
+    index = (type(piece).__name__, piece.side, space.row, space.col)
+    key = _piece_keys.get(index)
+    if key is None:
+        key = _derive_key("%s:%d:%d:%d" % index)
+        _piece_keys[index] = key
+    return key
+
+
+def side_key(side):
+    "Returns the key component for the side to move"
+    return SIDE_KEY if side == BLACK else 0